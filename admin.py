@@ -1,11 +1,12 @@
 from flask import Blueprint, render_template, jsonify, request
-from database import Database
+from werkzeug.local import LocalProxy
+from database import add_search_fields, get_database, prefix_match
 from datetime import datetime
 import json
 from bson import ObjectId
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
-db = Database()
+db = LocalProxy(get_database)
 
 class CustomJSONEncoder(json.JSONEncoder):
     """Custom JSON encoder to handle MongoDB ObjectId and datetime objects"""
@@ -68,6 +69,7 @@ def delete_user(user_id):
             'reason': request.json.get('reason', 'Admin deletion') if request.is_json else 'Admin deletion',
             'user_data': user  # Store complete user data for reference
         }
+        add_search_fields(deletion_record, 'deleted_users')
         
         # Insert into deleted_users collection
         # Fix: Use client to get database, then collection
@@ -127,6 +129,7 @@ def restore_user(user_id):
         user_data['restored_by'] = 'admin'
         
         # Insert back into users collection
+        add_search_fields(user_data, 'users')
         db.users_collection.insert_one(user_data)
         
         # Remove from deleted_users collection
@@ -206,11 +209,11 @@ def search_user():
         return jsonify({'error': 'Search query required'}), 400
     
     try:
-        # Search by username or email
+        # Search by username or email prefix, ignoring case
         users = list(db.users_collection.find({
             '$or': [
-                {'username': {'$regex': query, '$options': 'i'}},
-                {'email': {'$regex': query, '$options': 'i'}}
+                {'username_lc': prefix_match(query)},
+                {'email_lc': prefix_match(query)}
             ]
         }))
         
@@ -229,11 +232,11 @@ def search_deleted_user():
     try:
         deleted_users_collection = db.client[db.database_name]['deleted_users']
         
-        # Search by username or email in deleted users
+        # Search by username or email prefix in deleted users, ignoring case
         deleted_users = list(deleted_users_collection.find({
             '$or': [
-                {'username': {'$regex': query, '$options': 'i'}},
-                {'email': {'$regex': query, '$options': 'i'}}
+                {'username_lc': prefix_match(query)},
+                {'email_lc': prefix_match(query)}
             ]
         }).sort('deleted_at', -1))
         
@@ -1,35 +1,34 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, stream_with_context
 from flask_cors import CORS
-from database import Database
-from auth import Auth
-import joblib
-import pandas as pd
-import numpy as np
+from database import database_pool_stats, get_database
+from auth import Auth, admin_required
 import os
 import json
 import logging
 from datetime import datetime, timedelta
 from urllib.parse import quote
-import io
-import base64
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
 import warnings
 import random
+import itertools
 import threading
 import time
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import uuid
-from flask_pymongo import PyMongo
 from bson import ObjectId
 from admin import admin_bp
+from cache import TTLCache
+from charts import ChartService
+from compliance import ComplianceScheduler, COMPLIANCE_QUERY_LIMIT, query as query_compliance
+from counters import CounterBuffer, flush_at_exit
+from model_registry import ModelRegistry, check_version_name
+from prediction import CATEGORICAL_COLUMNS, add_engineered_features, build_price_result, predict_batch
+from timing import stage, start_request, finish_request, server_timing_header
+from vehicle_info import (CAR_DATABASE, compliance_record, get_car_real_time_info, listing_ownership_costs,
+                          vehicle_info_cache)
+from werkzeug.local import LocalProxy
 from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
 import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
 warnings.filterwarnings('ignore')
 
@@ -43,8 +42,8 @@ RECIPIENT_EMAIL = "chandanpernaje2@gmail.com"
 
 app.secret_key = os.environ.get('SECRET_KEY', '9f1c56e5a0d1e49d9187a1e2d9f3bc458cb29b15d2bfa35e38f2364775b9f9a7')
 CORS(app)  # Enable CORS for API endpoints
-# Initialize database and auth
-db = Database()
+# Initialize database and auth; the MongoDB connection is opened on first use
+db = LocalProxy(get_database)
 auth = Auth(db)
 app.register_blueprint(admin_bp)
 
@@ -52,11 +51,44 @@ app.register_blueprint(admin_bp)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global variables for models
-model = None
-scaler = None
-encoders = None
-feature_columns = None
+# Currently served ModelBundle; replaced wholesale on reload so requests that
+# already took a reference keep using a consistent model/encoders/features set
+active_bundle = None
+model_registry = ModelRegistry()
+
+# Inference engine used by predict_car_price: 'compiled' or 'sklearn'
+PREDICTION_ENGINE = os.environ.get('PREDICTION_ENGINE', 'compiled')
+
+# Wall-clock seconds the last load_models call took
+model_load_seconds = None
+
+# Bumped on every model load so results from a previous model are never served
+model_generation = 0
+_activation_lock = threading.Lock()
+
+# How often each process checks the registry's ACTIVE pointer for a new version
+MODEL_RELOAD_POLL_SECONDS = float(os.environ.get('MODEL_RELOAD_POLL_SECONDS', 30))
+_reload_status = {'state': 'idle'}
+# Guards the check-then-set of _reload_status so only one reload runs per process
+_reload_lock = threading.Lock()
+_registry_watcher_pid = None
+prediction_cache = TTLCache(
+    maxsize=int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+)
+
+# Price comparison charts are rendered in a background pool and served from /charts/price
+chart_service = ChartService()
+
+# Periodic sweep of listed cars into the compliance collection (COMPLIANCE_SWEEP_INTERVAL)
+compliance_scheduler = ComplianceScheduler(get_database)
+
+# View/favorite counts are buffered per listing and written with $inc every COUNTER_FLUSH_INTERVAL
+counter_buffer = CounterBuffer(get_database)
+flush_at_exit(counter_buffer)
+
+# Upper bound on cars accepted by /api/predict/batch in a single request
+MAX_BATCH_SIZE = 50000
 
 class JSONEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -66,10 +98,25 @@ class JSONEncoder(json.JSONEncoder):
 
 app.json_encoder = JSONEncoder
 
+@app.before_request
+def begin_stage_timings():
+    start_request()
+    _start_registry_watcher()
+    compliance_scheduler.start()
+
+@app.after_request
+def report_stage_timings(response):
+    """Expose per-stage latency (encode, features, predict, ...) via Server-Timing"""
+    timings = finish_request()
+    if timings:
+        response.headers['Server-Timing'] = server_timing_header(timings)
+    return response
+
 # CarMarketplace class
 class CarMarketplace:
-    def __init__(self, db):
+    def __init__(self, db, counters=None):
         self.db = db
+        self.counters = counters
         self.categories = {
             'luxury': ['BMW', 'Mercedes-Benz', 'Audi', 'Jaguar', 'Lexus', 'Porsche'],
             'premium': ['Honda', 'Toyota', 'Hyundai', 'Volkswagen', 'Skoda', 'Nissan'],
@@ -133,7 +180,7 @@ class CarMarketplace:
                     }
                     self.add_listing(new_car)
                 else:
-                    cars = self.db.get_all_cars()
+                    cars = self.db.get_all_cars(projection={'_id': 1})
                     if cars:
                         listing = random.choice(cars)
                         listing_id = listing['_id']
@@ -410,7 +457,7 @@ class CarMarketplace:
             }
 
     def get_listing(self, listing_id: str) -> Optional[Dict]:
-        return self.db.find_car_by_id(listing_id)
+        return self.db.find_car_by_id(listing_id, projection='detail')
 
     def get_all_listings(self) -> List[Dict]:
         return self.db.get_all_cars()
@@ -418,69 +465,48 @@ class CarMarketplace:
     def search_listings(self, filters: Dict) -> List[Dict]:
         return self.db.search_cars(filters)
 
+    def page_listings(self, filters: Dict, page_size: Optional[int] = None, cursor: Optional[str] = None,
+                      projection: str = 'card') -> Tuple[List[Dict], Optional[str]]:
+        """One page of listings in filters['sort_by'] order (relevance for text searches) and the next cursor"""
+        sort = filters.get('sort_by') or ('relevance' if filters.get('search') else 'date')
+        return self.db.page_cars(filters, sort, page_size, cursor, projection)
+
     def get_featured_listings(self, limit: int = 6) -> List[Dict]:
-        all_listings = self.db.get_all_cars()
-        featured = sorted(all_listings, key=lambda x: (x.get('views', 0) + x.get('favorites', 0) * 2), reverse=True)
-        return featured[:limit]
+        return self.db.get_featured_cars(limit, projection='card')
 
     def update_listing_stats(self, listing_id: str, action: str):
-        listing = self.db.find_car_by_id(listing_id)
-        if listing:
-            update_data = {}
-            if action == 'view':
-                update_data['views'] = listing.get('views', 0) + 1
-            elif action == 'favorite':
-                update_data['favorites'] = listing.get('favorites', 0) + 1
-            update_data['last_updated'] = datetime.now()
-            self.db.update_car(listing_id, update_data)
-
-# Initialize marketplace with database
-marketplace = CarMarketplace(db)
-
-# Car database
-CAR_DATABASE = {
-    'registration_patterns': {
-        'DL': 'Delhi', 'MH': 'Maharashtra', 'KA': 'Karnataka', 'TN': 'Tamil Nadu',
-        'UP': 'Uttar Pradesh', 'GJ': 'Gujarat', 'RJ': 'Rajasthan', 'WB': 'West Bengal',
-        'AP': 'Andhra Pradesh', 'HR': 'Haryana', 'PB': 'Punjab', 'OR': 'Odisha',
-        'AS': 'Assam', 'BR': 'Bihar', 'CG': 'Chhattisgarh', 'GA': 'Goa',
-        'HP': 'Himachal Pradesh', 'JH': 'Jharkhand', 'KL': 'Kerala', 'MP': 'Madhya Pradesh'
-    },
-    'insurance_providers': [
-        'ICICI Lombard', 'HDFC ERGO', 'Bajaj Allianz', 'IFFCO Tokio',
-        'New India Assurance', 'Oriental Insurance', 'United India Insurance',
-        'National Insurance', 'Reliance General', 'Royal Sundaram', 'SBI General',
-        'Tata AIG', 'Future Generali', 'Cholamandalam MS', 'Liberty General'
-    ],
-    'service_centers': {
-        'Maruti': ['Maruti Service Center - Sector 18', 'Maruti Care - MG Road', 'Maruti Authorized - Whitefield'],
-        'Hyundai': ['Hyundai Service - Whitefield', 'Hyundai Care - Koramangala', 'Hyundai Authorized - Electronic City'],
-        'Honda': ['Honda Service Center - Electronic City', 'Honda Care - Indiranagar', 'Honda Authorized - Jayanagar'],
-        'Toyota': ['Toyota Service - Bommanahalli', 'Toyota Care - Jayanagar', 'Toyota Authorized - Whitefield'],
-        'BMW': ['BMW Service Center - Embassy Golf Links', 'BMW Authorized - Whitefield', 'BMW Premium - Koramangala'],
-        'Audi': ['Audi Service Center - Koramangala', 'Audi Authorized - Electronic City', 'Audi Premium - MG Road'],
-        'Mercedes-Benz': ['Mercedes Service - Whitefield', 'Mercedes Authorized - Koramangala'],
-        'Tata': ['Tata Service Center - Electronic City', 'Tata Authorized - Jayanagar'],
-        'Mahindra': ['Mahindra Service - Whitefield', 'Mahindra Care - Bommanahalli'],
-        'Ford': ['Ford Service Center - Electronic City', 'Ford Authorized - Koramangala']
-    },
-    'fuel_prices': {
-        'Petrol': {'price': 102.84, 'unit': '₹/L'},
-        'Diesel': {'price': 94.65, 'unit': '₹/L'},
-        'CNG': {'price': 75.50, 'unit': '₹/kg'},
-        'LPG': {'price': 85.20, 'unit': '₹/L'},
-        'Electric': {'price': 8.50, 'unit': '₹/kWh'}
-    }
-}
-
-def load_models():
-    global model, scaler, encoders, feature_columns
+        """Count a view or favorite with $inc, through the write-behind buffer when there is one"""
+        field = {'view': 'views', 'favorite': 'favorites'}.get(action)
+        if not field:
+            return False
+        if self.counters:
+            return self.counters.add(listing_id, field)
+        return self.db.increment_car_counters(listing_id, {field: 1})
+
+_marketplace = None
+_marketplace_lock = threading.Lock()
+
+def get_marketplace():
+    """Marketplace bound to the shared database, created (and seeded) on first use"""
+    global _marketplace
+    if _marketplace is None:
+        with _marketplace_lock:
+            if _marketplace is None:
+                _marketplace = CarMarketplace(db, counter_buffer)
+    return _marketplace
+
+marketplace = LocalProxy(get_marketplace)
+
+def load_models(engine=None, version=None):
+    """Load a model bundle from the registry (or the legacy root files) and serve it"""
+    global model_load_seconds
+    started = time.perf_counter()
     try:
-        model = joblib.load("best_car_price_model.pkl")
-        scaler = joblib.load("car_price_scaler.pkl")
-        encoders = joblib.load("label_encoders.pkl")
-        feature_columns = joblib.load("feature_columns.pkl")
-        logger.info("✅ All models loaded successfully!")
+        bundle = model_registry.load(version, engine or PREDICTION_ENGINE)
+        activate_bundle(bundle)
+        model_load_seconds = time.perf_counter() - started
+        logger.info(f"✅ All models loaded successfully in {model_load_seconds:.2f}s! "
+                    f"(version: {bundle.version}, engine: {bundle.predictor.name})")
         return True
     except FileNotFoundError as e:
         logger.error(f"❌ Model file not found: {e}")
@@ -489,320 +515,182 @@ def load_models():
         logger.error(f"❌ Error loading models: {e}")
         return False
 
-def generate_registration_number():
-    states = list(CAR_DATABASE['registration_patterns'].keys())
-    state = random.choice(states)
-    district = random.randint(1, 99)
-    series = random.choice(['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H'])
-    number = random.randint(1000, 9999)
-    return f"{state}{district:02d}{series}{number}"
+def activate_bundle(bundle):
+    """Atomically make bundle the one new requests are served from"""
+    global active_bundle, model_generation
+    with _activation_lock:
+        model_generation += 1
+        bundle.generation = model_generation
+        active_bundle = bundle
+        prediction_cache.clear()
+
+def _claim_reload(version):
+    """Mark a reload of version as started; False if this process is already loading one"""
+    with _reload_lock:
+        if _reload_status.get('state') == 'loading':
+            return False
+        _reload_status.update({'state': 'loading', 'requested_version': version,
+                               'started_at': datetime.now().isoformat()})
+        return True
+
+def reload_models(version=None, engine=None):
+    """Load, warm up and swap in a model version without interrupting in-flight requests"""
+    if not _claim_reload(version):
+        logger.info(f"Model reload of {version} skipped: another reload is in progress")
+        return False
+    return _run_reload(version, engine)
 
-def calculate_fuel_cost(fuel_type, mileage, monthly_km=1000):
+def _run_reload(version=None, engine=None):
+    """The body of reload_models, for a caller that already holds the reload claim"""
+    global model_load_seconds
+    started = time.perf_counter()
     try:
-        fuel_info = CAR_DATABASE['fuel_prices'].get(fuel_type, {'price': 100, 'unit': '₹/L'})
-        if fuel_type == 'Electric':
-            efficiency = 15
-            monthly_cost = (monthly_km / 100) * efficiency * fuel_info['price']
-        else:
-            monthly_fuel_needed = monthly_km / mileage
-            monthly_cost = monthly_fuel_needed * fuel_info['price']
-        return {
-            'monthly_cost': round(monthly_cost, 2),
-            'yearly_cost': round(monthly_cost * 12, 2),
-            'cost_per_km': round(monthly_cost / monthly_km, 2),
-            'fuel_price': fuel_info['price'],
-            'fuel_unit': fuel_info['unit']
-        }
+        bundle = model_registry.load(version, engine or PREDICTION_ENGINE)
+        bundle.warm_up()
+        activate_bundle(bundle)
+        model_load_seconds = time.perf_counter() - started
+        _reload_status.update({'state': 'succeeded', 'version': bundle.version,
+                               'finished_at': datetime.now().isoformat()})
+        logger.info(f"🔁 Swapped in model version {bundle.version} in {model_load_seconds:.2f}s")
+        return True
     except Exception as e:
-        logger.error(f"Error calculating fuel cost: {e}")
-        return {'monthly_cost': 0, 'yearly_cost': 0, 'cost_per_km': 0}
-
-def get_car_real_time_info(brand, year, registration_number=None, mileage=15.0, fuel='Petrol'):
-    if not registration_number:
-        registration_number = generate_registration_number()
-    state_code = registration_number[:2]
-    state_name = CAR_DATABASE['registration_patterns'].get(state_code, 'Unknown')
-    current_date = datetime.now()
-    insurance_start = current_date - timedelta(days=random.randint(30, 365))
-    insurance_expiry = insurance_start + timedelta(days=365)
-    insurance_expired = insurance_expiry < current_date
-    days_to_insurance_expiry = (insurance_expiry - current_date).days
-    puc_date = current_date - timedelta(days=random.randint(1, 180))
-    puc_expiry = puc_date + timedelta(days=180)
-    puc_expired = puc_expiry < current_date
-    days_to_puc_expiry = (puc_expiry - current_date).days
-    rc_issue_date = datetime(year, random.randint(1, 12), random.randint(1, 28))
-    rc_validity = rc_issue_date + timedelta(days=15*365)
-    rc_expired = rc_validity < current_date
-    days_to_rc_expiry = (rc_validity - current_date).days
-    fitness_required = year < 2015
-    fitness_expiry = None
-    fitness_expired = False
-    days_to_fitness_expiry = 0
-    if fitness_required:
-        fitness_date = current_date - timedelta(days=random.randint(1, 365))
-        fitness_expiry = fitness_date + timedelta(days=365)
-        fitness_expired = fitness_expiry < current_date
-        days_to_fitness_expiry = (fitness_expiry - current_date).days
-    car_age = 2024 - year
-    base_premium = 12000 + (car_age * 800)
-    if insurance_expired:
-        base_premium *= 1.25
-    if brand in ['BMW', 'Audi', 'Mercedes-Benz']:
-        base_premium *= 2.5
-    elif brand in ['Honda', 'Toyota', 'Hyundai']:
-        base_premium *= 1.2
-    fuel_cost_data = calculate_fuel_cost(fuel, mileage)
-    service_cost = 3000
-    if brand in ['BMW', 'Audi', 'Mercedes-Benz']:
-        service_cost *= 4
-    elif brand in ['Honda', 'Toyota']:
-        service_cost *= 1.5
-    insurance_provider = random.choice(CAR_DATABASE['insurance_providers'])
-    service_centers = CAR_DATABASE['service_centers'].get(brand, ['Generic Service Center - Local Area'])
-    return {
-        'registration_number': registration_number,
-        'state': state_name,
-        'state_code': state_code,
-        'insurance': {
-            'provider': insurance_provider,
-            'policy_number': f"POL{random.randint(100000000, 999999999)}",
-            'start_date': insurance_start.strftime('%d-%m-%Y'),
-            'expiry_date': insurance_expiry.strftime('%d-%m-%Y'),
-            'expired': insurance_expired,
-            'days_remaining': max(0, days_to_insurance_expiry),
-            'status': 'Expired' if insurance_expired else 'Active',
-            'premium_estimate': f"₹{base_premium:,.0f}",
-            'coverage_type': random.choice(['Comprehensive', 'Third Party', 'Zero Depreciation']),
-            'idv': f"₹{random.randint(200000, 1500000):,.0f}",
-            'no_claim_bonus': f"{random.randint(0, 50)}%"
-        },
-        'puc': {
-            'certificate_number': f"PUC{random.randint(10000000, 99999999)}",
-            'issue_date': puc_date.strftime('%d-%m-%Y'),
-            'expiry_date': puc_expiry.strftime('%d-%m-%Y'),
-            'expired': puc_expired,
-            'days_remaining': max(0, days_to_puc_expiry),
-            'status': 'Expired' if puc_expired else 'Valid',
-            'testing_center': f"Authorized PUC Center - {state_name}",
-            'emission_standard': 'BS6' if year >= 2020 else 'BS4',
-            'fee': '₹150'
-        },
-        'registration': {
-            'rc_number': registration_number,
-            'issue_date': rc_issue_date.strftime('%d-%m-%Y'),
-            'validity_date': rc_validity.strftime('%d-%m-%Y'),
-            'expired': rc_expired,
-            'days_remaining': max(0, days_to_rc_expiry),
-            'status': 'Expired' if rc_expired else 'Valid',
-            'rto_office': f"RTO {state_code}-{random.randint(1, 20)}",
-            'vehicle_class': 'Motor Car'
-        },
-        'fitness': {
-            'required': fitness_required,
-            'certificate_number': f"FIT{random.randint(10000000, 99999999)}" if fitness_required else None,
-            'expiry_date': fitness_expiry.strftime('%d-%m-%Y') if fitness_expiry else None,
-            'expired': fitness_expired,
-            'days_remaining': max(0, days_to_fitness_expiry),
-            'status': 'Expired' if fitness_expired else 'Valid' if fitness_required else 'Not Required',
-            'fee': '₹500' if fitness_required else 'N/A'
-        },
-        'service': {
-            'last_service_date': (current_date - timedelta(days=random.randint(30, 180))).strftime('%d-%m-%Y'),
-            'next_service_due': (current_date + timedelta(days=random.randint(30, 90))).strftime('%d-%m-%Y'),
-            'service_centers': service_centers[:3],
-            'total_services': random.randint(car_age * 2, car_age * 4),
-            'service_cost_estimate': f"₹{service_cost:,.0f}",
-            'service_interval': '6 months / 10,000 km'
-        },
-        'fuel_analysis': fuel_cost_data,
-        'ownership_cost': {
-            'monthly_insurance': f"₹{base_premium/12:,.0f}",
-            'monthly_fuel': f"₹{fuel_cost_data['monthly_cost']:,.0f}",
-            'monthly_service': f"₹{service_cost/6:,.0f}",
-            'total_monthly': f"₹{(base_premium/12 + fuel_cost_data['monthly_cost'] + service_cost/6):,.0f}"
-        },
-        'alerts': generate_enhanced_alerts(insurance_expired, puc_expired, rc_expired, fitness_expired,
-                                         days_to_insurance_expiry, days_to_puc_expiry),
-        'overall_status': get_overall_status(insurance_expired, puc_expired, rc_expired, fitness_expired),
-        'compliance_score': calculate_compliance_score(insurance_expired, puc_expired, rc_expired, fitness_expired)
-    }
-
-def generate_enhanced_alerts(insurance_expired, puc_expired, rc_expired, fitness_expired,
-                           days_to_insurance, days_to_puc):
-    alerts = []
-    if insurance_expired:
-        alerts.append({
-            'type': 'critical',
-            'priority': 1,
-            'title': 'Insurance Expired - Immediate Action Required',
-            'message': 'Driving without insurance is illegal. You may face penalties up to ₹2,000 and vehicle seizure.',
-            'action': 'Renew insurance immediately',
-            'estimated_cost': '₹15,000 - ₹50,000'
-        })
-    elif days_to_insurance <= 30:
-        alerts.append({
-            'type': 'warning',
-            'priority': 2,
-            'title': 'Insurance Expiring Soon',
-            'message': f'Your insurance expires in {days_to_insurance} days. Start renewal to avoid penalties.',
-            'action': 'Initiate renewal process',
-            'estimated_cost': '₹12,000 - ₹45,000'
-        })
-    if puc_expired:
-        alerts.append({
-            'type': 'critical',
-            'priority': 1,
-            'title': 'PUC Certificate Expired',
-            'message': 'Expired PUC can result in fines up to ₹1,000. Required for insurance claims.',
-            'action': 'Get PUC test done immediately',
-            'estimated_cost': '₹150'
-        })
-    elif days_to_puc <= 15:
-        alerts.append({
-            'type': 'warning',
-            'priority': 2,
-            'title': 'PUC Expiring Soon',
-            'message': f'PUC expires in {days_to_puc} days. Book appointment to avoid last-minute rush.',
-            'action': 'Schedule PUC test',
-            'estimated_cost': '₹150'
-        })
-    if rc_expired:
-        alerts.append({
-            'type': 'critical',
-            'priority': 1,
-            'title': 'Registration Certificate Expired',
-            'message': 'Expired RC is a serious offense. Vehicle cannot be legally driven.',
-            'action': 'Visit RTO immediately for renewal',
-            'estimated_cost': '₹1,000 - ₹5,000'
-        })
-    if fitness_expired:
-        alerts.append({
-            'type': 'critical',
-            'priority': 1,
-            'title': 'Fitness Certificate Expired',
-            'message': 'Required for vehicles over 15 years. Mandatory for legal operation.',
-            'action': 'Get fitness certificate from RTO',
-            'estimated_cost': '₹500 - ₹2,000'
-        })
-    if not alerts:
-        alerts.append({
-            'type': 'success',
-            'priority': 0,
-            'title': 'All Documents Valid ✅',
-            'message': 'Your vehicle is fully compliant with all regulations.',
-            'action': 'Maintain regular checks',
-            'estimated_cost': 'No immediate costs'
-        })
-    return sorted(alerts, key=lambda x: x['priority'])
-
-def get_overall_status(insurance_expired, puc_expired, rc_expired, fitness_expired):
-    expired_count = sum([insurance_expired, puc_expired, rc_expired, fitness_expired])
-    if expired_count == 0:
-        return 'Fully Compliant'
-    elif expired_count <= 2:
-        return 'Partially Compliant'
-    else:
-        return 'Non-Compliant'
+        _reload_status.update({'state': 'failed', 'error': str(e),
+                               'finished_at': datetime.now().isoformat()})
+        logger.error(f"❌ Model reload failed, still serving {active_bundle.version if active_bundle else None}: {e}")
+        return False
 
-def calculate_compliance_score(insurance_expired, puc_expired, rc_expired, fitness_expired):
-    score = 100
-    if insurance_expired: score -= 40
-    if puc_expired: score -= 25
-    if rc_expired: score -= 30
-    if fitness_expired: score -= 15
-    return max(0, score)
+def _start_registry_watcher():
+    """Poll the registry's ACTIVE pointer so every worker process follows version switches"""
+    global _registry_watcher_pid
+    if _registry_watcher_pid == os.getpid() or MODEL_RELOAD_POLL_SECONDS <= 0:
+        return
+    _registry_watcher_pid = os.getpid()
+
+    def watch(last_marker):
+        while True:
+            time.sleep(MODEL_RELOAD_POLL_SECONDS)
+            marker = model_registry.active_marker()
+            if marker != last_marker:
+                version = model_registry.active_version()
+                bundle = active_bundle
+                if bundle is not None and version == bundle.version:
+                    last_marker = marker
+                elif _reload_status.get('state') == 'loading':
+                    # Already loading this version (e.g. via /admin/models/reload); otherwise retry next poll
+                    if _reload_status.get('requested_version') == version:
+                        last_marker = marker
+                elif reload_models(version):
+                    last_marker = marker
+
+    thread = threading.Thread(target=watch, args=(model_registry.active_marker(),), daemon=True)
+    thread.start()
+
+def prediction_cache_key(brand, year, km_driven, fuel, seller_type, transmission, owner,
+                         mileage, engine, max_power, seats, torque_value):
+    """Normalized 12-field key, or None when the inputs shouldn't be cached"""
+    numbers = (year, km_driven, mileage, engine, max_power, seats, torque_value)
+    labels = (brand, fuel, seller_type, transmission, owner)
+    # Only plain numbers normalize safely: 2018 and 2018.0 predict the same, "2018" does not
+    if not all(isinstance(n, (int, float)) and not isinstance(n, bool) for n in numbers):
+        return None
+    if not all(isinstance(label, str) for label in labels):
+        return None
+    return labels + tuple(float(n) for n in numbers)
 
 def predict_car_price(brand, year, km_driven, fuel, seller_type, transmission, owner,
                      mileage, engine, max_power, seats, torque_value):
+    """Cached front for _predict_car_price; only successful predictions are stored"""
+    bundle = active_bundle
+    if bundle is None:
+        return None, "Models not loaded"
+    args = (brand, year, km_driven, fuel, seller_type, transmission, owner,
+            mileage, engine, max_power, seats, torque_value)
+    key = prediction_cache_key(*args)
+    if key is not None:
+        key = (bundle.generation,) + key
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            return dict(cached), None
+    result, error = _predict_car_price(bundle, *args)
+    if key is not None and error is None:
+        prediction_cache.set(key, dict(result))
+    return result, error
+
+def _predict_car_price(bundle, brand, year, km_driven, fuel, seller_type, transmission, owner,
+                       mileage, engine, max_power, seats, torque_value):
     try:
         if not all([brand, year, km_driven, fuel, seller_type, transmission, owner]):
             return None, "Missing required fields"
-        input_data = pd.DataFrame({
-            'brand': [brand],
-            'year': [year],
-            'km_driven': [km_driven],
-            'fuel': [fuel],
-            'seller_type': [seller_type],
-            'transmission': [transmission],
-            'owner': [owner],
-            'mileage': [mileage],
-            'engine': [engine],
-            'max_power': [max_power],
-            'seats': [seats],
-            'torque_value': [torque_value]
-        })
-        input_data['car_age'] = 2024 - input_data['year']
-        input_data['power_to_weight'] = input_data['max_power'] / input_data['engine'] * 1000
-        input_data['mileage_efficiency'] = input_data['mileage'] / input_data['engine'] * 1000
-        input_data['power_to_weight'] = input_data['power_to_weight'].replace([np.inf, -np.inf], 0)
-        input_data['mileage_efficiency'] = input_data['mileage_efficiency'].replace([np.inf, -np.inf], 0)
-        for col in ['brand', 'fuel', 'seller_type', 'transmission', 'owner']:
-            try:
-                if col in encoders:
-                    input_data[col + '_encoded'] = encoders[col].transform([input_data[col].iloc[0]])[0]
-                else:
+        raw_values = {'brand': brand, 'fuel': fuel, 'seller_type': seller_type,
+                      'transmission': transmission, 'owner': owner}
+        encoded = {}
+        with stage('encode'):
+            for col in CATEGORICAL_COLUMNS:
+                if col not in bundle.encoding_tables:
                     return None, f"Encoder not available for {col}"
-            except ValueError:
-                return None, f"Unknown {col} value: {input_data[col].iloc[0]}"
-        try:
-            X_input = input_data[feature_columns]
-        except KeyError as e:
-            return None, f"Missing feature columns: {e}"
-        prediction = model.predict(X_input)[0]
-        confidence_lower = prediction * 0.85
-        confidence_upper = prediction * 1.15
-        return {
-            'price': prediction,
-            'confidence_lower': confidence_lower,
-            'confidence_upper': confidence_upper,
-            'confidence_range': f"₹{confidence_lower:,.0f} - ₹{confidence_upper:,.0f}"
-        }, None
+                try:
+                    encoded[col + '_encoded'] = [bundle.encoding_tables.encode(col, raw_values[col])]
+                except ValueError as e:
+                    return None, str(e)
+        with stage('features'):
+            import pandas as pd
+            input_data = pd.DataFrame({
+                'brand': [brand],
+                'year': [year],
+                'km_driven': [km_driven],
+                'fuel': [fuel],
+                'seller_type': [seller_type],
+                'transmission': [transmission],
+                'owner': [owner],
+                'mileage': [mileage],
+                'engine': [engine],
+                'max_power': [max_power],
+                'seats': [seats],
+                'torque_value': [torque_value],
+                **encoded
+            })
+            input_data = add_engineered_features(input_data)
+            try:
+                X_input = input_data[bundle.feature_columns]
+            except KeyError as e:
+                return None, f"Missing feature columns: {e}"
+        with stage('predict'):
+            prediction = bundle.predictor.predict(X_input)[0]
+        result = build_price_result(prediction)
+        result['model_version'] = bundle.version
+        return result, None
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         return None, str(e)
 
-def generate_price_visualization(predicted_price, brand, year):
+def predict_car_prices_batch(cars, bundle=None):
+    """Vectorized counterpart of predict_car_price for a list of car dicts.
+
+    Returns a list of (result, error) tuples, one per input car.
+    """
+    bundle = bundle or active_bundle
+    if bundle is None:
+        return [(None, "Models not loaded")] * len(cars)
     try:
-        brands = ['Maruti', 'Hyundai', 'Honda', 'Toyota', 'Tata']
-        if brand not in brands:
-            brands[0] = brand
-        np.random.seed(42)
-        prices = []
-        for b in brands:
-            if b == brand:
-                prices.append(predicted_price)
-            else:
-                base_price = predicted_price * np.random.uniform(0.7, 1.3)
-                prices.append(base_price)
-        plt.style.use('seaborn-v0_8')
-        fig, ax = plt.subplots(figsize=(10, 6))
-        colors = ['#FF6B6B' if b == brand else '#4ECDC4' for b in brands]
-        bars = ax.bar(brands, prices, color=colors, alpha=0.8)
-        for i, bar in enumerate(bars):
-            if brands[i] == brand:
-                bar.set_edgecolor('#FF6B6B')
-                bar.set_linewidth(3)
-        ax.set_title(f'Price Comparison - {brand} {year}', fontsize=16, fontweight='bold')
-        ax.set_ylabel('Price (₹)', fontsize=12)
-        ax.set_xlabel('Car Brands', fontsize=12)
-        ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'₹{x/100000:.1f}L'))
-        for bar, price in zip(bars, prices):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                   f'₹{price/100000:.1f}L',
-                   ha='center', va='bottom', fontweight='bold')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        img = io.BytesIO()
-        plt.savefig(img, format='png', dpi=150, bbox_inches='tight')
-        img.seek(0)
-        plot_url = base64.b64encode(img.getvalue()).decode()
-        plt.close()
-        return plot_url
+        return predict_batch(cars, bundle.predictor, bundle.encoding_tables, bundle.feature_columns)
     except Exception as e:
-        logger.error(f"Visualization error: {e}")
-        return None
+        logger.error(f"Batch prediction error: {e}")
+        return [(None, str(e))] * len(cars)
+
+def paged_json(items, next_cursor):
+    """JSON array response carrying the next page's cursor in X-Next-Cursor (absent on the last page)"""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+def add_monthly_costs(listings, monthly_km=1000):
+    """Set monthly_cost (insurance + fuel + service, in ₹) on every listing, in one vectorized pass"""
+    if listings:
+        totals = listing_ownership_costs(listings, monthly_km)['total'].round().astype(int).tolist()
+        for listing, total in zip(listings, totals):
+            listing['monthly_cost'] = total
+    return listings
 
 def format_price(price):
     if price >= 10000000:
@@ -889,6 +777,9 @@ def about():
 
 @app.route('/send-email', methods=['POST'])
 def send_email():
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
     try:
         # Get form data (assuming FormData, not JSON)
         name = request.form.get('name')
@@ -956,9 +847,9 @@ def get_csrf_token():
 def car_details(listing_id):
     """Car details page"""
     try:
-        listing = db.find_car_by_id(listing_id)
+        listing = db.find_car_by_id(listing_id, projection='detail')
         if listing:
-            db.update_car(listing_id, {'views': listing.get('views', 0) + 1})
+            counter_buffer.add(listing_id, 'views')
             return render_template('cardetails.html', listing=listing, error=None)
         else:
             return render_template('cardetails.html', listing=None, error="Car listing not found")
@@ -987,14 +878,22 @@ def get_cars():
         if request.args.get('search'):
             filters['search'] = request.args.get('search')
         
-        limit = request.args.get('limit')
-        cars = db.search_cars(filters) if filters else db.get_all_cars(limit=int(limit) if limit else None)
+        sort = request.args.get('sort') or ('relevance' if filters.get('search') else 'date')
+        cars, next_cursor = db.page_cars(filters, sort,
+                                         request.args.get('limit', type=int), request.args.get('cursor'),
+                                         projection='card')
         
         return jsonify({
             'success': True,
             'cars': cars,
-            'total': len(cars)
+            'total': len(cars),
+            'next_cursor': next_cursor
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -1005,7 +904,7 @@ def get_cars():
 def get_car(car_id):
     """Get a specific car by ID"""
     try:
-        car = db.find_car_by_id(car_id)
+        car = db.find_car_by_id(car_id, projection='detail')
         if car:
             return jsonify({
                 'success': True,
@@ -1249,9 +1148,15 @@ def search():
         filters['transmission'] = request.args.get('transmission')
     if request.args.get('sort_by'):
         filters['sort_by'] = request.args.get('sort_by')
+    if request.args.get('q'):
+        filters['search'] = request.args.get('q')
     
-    results = marketplace.search_listings(filters)
-    return render_template('search.html', listings=results, filters=filters)
+    try:
+        results, next_cursor = marketplace.page_listings(filters, request.args.get('limit', type=int),
+                                                         request.args.get('cursor'), projection='summary')
+    except ValueError:
+        results, next_cursor = marketplace.page_listings(filters, projection='summary')
+    return render_template('search.html', listings=results, filters=filters, next_cursor=next_cursor)
 
 @app.route('/featured')
 def featured():
@@ -1261,12 +1166,18 @@ def featured():
 
 @app.route('/api/listings')
 def api_listings():
-    """API endpoint for listings"""
-    listings = marketplace.get_all_listings()
+    """API endpoint for listings, a page at a time (?limit=&cursor=&sort_by=)"""
+    try:
+        listings, next_cursor = marketplace.page_listings({'sort_by': request.args.get('sort_by')},
+                                                          request.args.get('limit', type=int),
+                                                          request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    listings = add_monthly_costs(listings, request.args.get('monthly_km', 1000, type=float))
     for listing in listings:
         listing['posted_date'] = listing['posted_date'].isoformat()
         listing['last_updated'] = listing['last_updated'].isoformat()
-    return jsonify(listings)
+    return paged_json(listings, next_cursor)
 
 @app.route('/api/car/<listing_id>')
 def api_car_details(listing_id):
@@ -1302,12 +1213,19 @@ def api_search():
         filters['transmission'] = request.args.get('transmission')
     if request.args.get('sort_by'):
         filters['sort_by'] = request.args.get('sort_by')
+    if request.args.get('q'):
+        filters['search'] = request.args.get('q')
     
-    results = marketplace.search_listings(filters)
+    try:
+        results, next_cursor = marketplace.page_listings(filters, request.args.get('limit', type=int),
+                                                         request.args.get('cursor'), projection='summary')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    results = add_monthly_costs(results, request.args.get('monthly_km', 1000, type=float))
     for listing in results:
         listing['posted_date'] = listing['posted_date'].isoformat()
         listing['last_updated'] = listing['last_updated'].isoformat()
-    return jsonify(results)
+    return paged_json(results, next_cursor)
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -1342,7 +1260,8 @@ def predict():
             return render_template('result.html', error=error, input_data=data)
         predicted_price = prediction_result['price']
         real_time_info = get_car_real_time_info(brand, year, registration_number, mileage, fuel)
-        price_chart = generate_price_visualization(predicted_price, brand, year)
+        brand_key, year_key, price_key = chart_service.prefetch(brand, year, predicted_price)
+        price_chart_url = url_for('price_chart', brand=brand_key, year=year_key, price=price_key)
         car_age = 2024 - year
         depreciation_rate = max(0, (car_age * 8))
         return render_template('result.html',
@@ -1358,7 +1277,7 @@ def predict():
                              depreciation_rate=depreciation_rate,
                              prediction_date=datetime.now().strftime('%d-%m-%Y %H:%M'),
                              real_time_info=real_time_info,
-                             price_chart=price_chart)
+                             price_chart_url=price_chart_url)
     except ValueError as e:
         return render_template('result.html',
                              error=f"Input validation error: {str(e)}",
@@ -1369,6 +1288,22 @@ def predict():
                              error=f"Prediction error: {str(e)}",
                              input_data=request.form)
 
+@app.route('/charts/price/<brand>/<int:year>/<int:price>.png')
+def price_chart(brand, year, price):
+    # Only keys /predict can produce, so the disk cache can't be filled with arbitrary charts
+    bundle = active_bundle
+    known_brand = bundle is not None and brand in bundle.encoding_tables.tables.get('brand', {})
+    if not known_brand or not 1990 <= year <= 2024 or not 0 < price <= 1000000000:
+        return jsonify({'error': 'Chart not found'}), 404
+    try:
+        png = chart_service.get(brand, year, price)
+    except Exception as e:
+        logger.error(f"Visualization error: {e}")
+        return jsonify({'error': 'Chart rendering failed'}), 500
+    response = app.response_class(png, mimetype='image/png')
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
 @app.route('/api/predict', methods=['POST'])
 def api_predict():
     try:
@@ -1400,7 +1335,7 @@ def api_predict():
             'car_age': 2024 - data['year'],
             'real_time_info': real_time_info,
             'prediction_timestamp': datetime.now().isoformat(),
-            'model_version': '2.0',
+            'model_version': prediction_result['model_version'],
             'accuracy': '90.2%'
         }
         return jsonify(response)
@@ -1408,6 +1343,44 @@ def api_predict():
         logger.error(f"API error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/predict/batch', methods=['POST'])
+def api_predict_batch():
+    """Price a whole inventory in one request"""
+    try:
+        data = request.get_json(silent=True)
+        cars = data.get('cars') if isinstance(data, dict) else data
+        if not isinstance(cars, list):
+            return jsonify({'error': 'Request body must be a list of cars or {"cars": [...]}'}), 400
+        if len(cars) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'Batch too large: maximum is {MAX_BATCH_SIZE} cars'}), 413
+        bundle = active_bundle
+        if bundle is None:
+            return jsonify({'error': 'Models not loaded'}), 503
+        results = []
+        failed = 0
+        for index, (prediction_result, error) in enumerate(predict_car_prices_batch(cars, bundle)):
+            if error:
+                failed += 1
+                results.append({'index': index, 'error': error})
+            else:
+                results.append({
+                    'index': index,
+                    'predicted_price': prediction_result['price'],
+                    'formatted_price': f"₹{prediction_result['price']:,.2f}",
+                    'confidence_range': prediction_result['confidence_range']
+                })
+        return jsonify({
+            'results': results,
+            'total': len(cars),
+            'succeeded': len(cars) - failed,
+            'failed': failed,
+            'prediction_timestamp': datetime.now().isoformat(),
+            'model_version': bundle.version
+        })
+    except Exception as e:
+        logger.error(f"Batch API error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/vehicle-info/<registration_number>')
 def get_vehicle_info(registration_number):
     try:
@@ -1419,6 +1392,95 @@ def get_vehicle_info(registration_number):
         logger.error(f"Vehicle info error: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Plates per bulk request; the response streams, so this only bounds request time
+FLEET_MAX_VEHICLES = int(os.environ.get('FLEET_MAX_VEHICLES', 50000))
+# Records per write: the first goes out alone so clients see results immediately
+FLEET_STREAM_BATCH = 200
+
+def _fleet_vehicles():
+    """(plate, brand, year, mileage, fuel) per requested vehicle, read lazily where the body allows.
+
+    JSON bodies are a list of plates or of {registration_number, brand, year,
+    mileage, fuel} objects (optionally under "vehicles"); any other body is
+    read from the request stream as one plate per line.
+    """
+    if request.is_json:
+        payload = request.get_json()
+        if isinstance(payload, dict):
+            payload = payload.get('vehicles')
+        if not isinstance(payload, list):
+            raise ValueError('Expected a JSON list of registration numbers or vehicles')
+        for item in payload:
+            if isinstance(item, dict):
+                yield (item.get('registration_number'), item.get('brand', 'Maruti'), item.get('year', 2018),
+                       item.get('mileage', 15.0), item.get('fuel', 'Petrol'))
+            else:
+                yield item, 'Maruti', 2018, 15.0, 'Petrol'
+    else:
+        for line in request.stream:
+            plate = line.decode('utf-8', 'replace').strip()
+            if plate:
+                yield plate, 'Maruti', 2018, 15.0, 'Petrol'
+
+def _fleet_records(vehicles, as_of):
+    for count, (plate, brand, year, mileage, fuel) in enumerate(vehicles):
+        if count == FLEET_MAX_VEHICLES:
+            yield {'error': f'Fleet limit of {FLEET_MAX_VEHICLES} vehicles reached; remaining plates skipped'}
+            return
+        if not isinstance(plate, str) or len(plate.strip()) < 8:
+            yield {'registration_number': plate, 'error': 'Invalid registration number format'}
+            continue
+        try:
+            yield compliance_record(plate.strip().upper(), str(brand), int(year), float(mileage), str(fuel), as_of)
+        except (TypeError, ValueError) as e:
+            yield {'registration_number': plate, 'error': f'Invalid vehicle details: {e}'}
+
+@app.route('/api/vehicle-info/bulk', methods=['POST'])
+def bulk_vehicle_info():
+    """Compliance status for a fleet, streamed as NDJSON in request order"""
+    vehicles = _fleet_vehicles()
+    try:
+        first = next(vehicles, None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if first is None:
+        return jsonify({'error': 'No registration numbers supplied'}), 400
+    # One date for the whole fleet, so a stream that runs past midnight stays consistent
+    as_of = datetime.now().date()
+
+    def generate():
+        batch, batch_size = [], 1
+        try:
+            for record in _fleet_records(itertools.chain([first], vehicles), as_of):
+                batch.append(json.dumps(record))
+                if len(batch) >= batch_size:
+                    yield '\n'.join(batch) + '\n'
+                    batch, batch_size = [], FLEET_STREAM_BATCH
+        except Exception as e:
+            logger.error(f"Bulk vehicle info error: {e}")
+            batch.append(json.dumps({'error': 'Bulk vehicle info failed; results are incomplete'}))
+        if batch:
+            yield '\n'.join(batch) + '\n'
+
+    return app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/compliance')
+def get_compliance():
+    """Materialized compliance status, filtered by state, status, document and days to expiry"""
+    try:
+        expiring_within = request.args.get('expiring_within', type=int)
+        limit = min(request.args.get('limit', 50, type=int), COMPLIANCE_QUERY_LIMIT)
+        result = query_compliance(db, state=request.args.get('state'), status=request.args.get('status'),
+                                  document=request.args.get('document'), expiring_within=expiring_within,
+                                  limit=limit, skip=request.args.get('skip', 0, type=int))
+        result['last_sweep'] = compliance_scheduler.last_run
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Compliance query error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/listings', methods=['GET'])
 def get_listings():
     try:
@@ -1431,10 +1493,13 @@ def get_listings():
             'year_from': int(request.args.get('year_from', 1900)),
             'year_to': int(request.args.get('year_to', 2024)),
             'transmission': request.args.get('transmission', ''),
-            'sort_by': request.args.get('sort_by', 'date')
+            'sort_by': request.args.get('sort_by'),
+            'search': request.args.get('q', '')
         }
-        listings = marketplace.search_listings(filters)
-        return jsonify([{
+        listings, next_cursor = marketplace.page_listings(filters, request.args.get('limit', type=int),
+                                                          request.args.get('cursor'))
+        listings = add_monthly_costs(listings, request.args.get('monthly_km', 1000, type=float))
+        return paged_json([{
             'id': listing['_id'],
             'brand': listing['brand'],
             'model': listing['model'],
@@ -1451,40 +1516,104 @@ def get_listings():
             'views': listing.get('views', 0),
             'favorites': listing.get('favorites', 0),
             'images': listing.get('images', []),
-            'condition': listing.get('condition', {})
-        } for listing in listings])
+            'condition': listing.get('condition', {}),
+            'monthly_cost': listing['monthly_cost']
+        } for listing in listings], next_cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Listings error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/admin/models', methods=['GET'])
+@admin_required
+def list_model_versions():
+    """Registry contents, the version this process serves and the last reload outcome"""
+    return jsonify({
+        'serving_version': active_bundle.version if active_bundle else None,
+        'active_version': model_registry.active_version(),
+        'versions': model_registry.versions(),
+        'reload': _reload_status
+    })
+
+@app.route('/admin/models/reload', methods=['POST'])
+@admin_required
+def reload_model_version():
+    """Switch to a registry version (default: the ACTIVE one) in the background"""
+    data = request.get_json(silent=True) or {}
+    requested = data.get('version')
+    if requested is not None:
+        try:
+            check_version_name(requested)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    # Resolved now so the registry watcher can tell this load apart from a new ACTIVE version
+    version = requested or model_registry.active_version()
+    if not _claim_reload(version):
+        return jsonify({'error': 'A model reload is already in progress', 'reload': _reload_status}), 409
+    try:
+        if requested:
+            # Other worker processes pick the new pointer up via the registry watcher
+            model_registry.activate(version)
+    except FileNotFoundError as e:
+        _reload_status.update({'state': 'failed', 'error': str(e), 'finished_at': datetime.now().isoformat()})
+        return jsonify({'error': str(e)}), 404
+    threading.Thread(target=_run_reload, args=(version,), daemon=True).start()
+    return jsonify({'status': 'reloading', 'requested_version': version,
+                    'serving_version': active_bundle.version if active_bundle else None}), 202
+
 @app.route('/health')
 def health():
+    bundle = active_bundle
     model_status = {
-        'model_loaded': model is not None,
-        'scaler_loaded': scaler is not None,
-        'encoders_available': encoders is not None,
-        'feature_columns_loaded': feature_columns is not None
+        'model_loaded': bundle is not None and bundle.available('model'),
+        'scaler_loaded': bundle is not None and bundle.available('scaler'),
+        'encoders_available': bundle is not None and bundle.available('encoders'),
+        'feature_columns_loaded': bundle is not None and bundle.feature_columns is not None
     }
     overall_health = all(model_status.values())
     return jsonify({
         'status': 'healthy' if overall_health else 'unhealthy',
         'components': model_status,
+        'model_version': bundle.version if bundle else None,
         'database_status': 'operational',
         'marketplace_listings': db.get_collection_stats().get('total_cars', 0),
+        'prediction_cache': prediction_cache.stats(),
         'timestamp': datetime.now().isoformat(),
         'version': '2.0.0'
     })
 
+@app.route('/metrics')
+def metrics():
+    """Runtime counters for the prediction path"""
+    return jsonify({
+        'prediction_cache': prediction_cache.stats(),
+        'model_generation': model_generation,
+        'model_version': active_bundle.version if active_bundle else None,
+        'model_load_seconds': model_load_seconds,
+        'prediction_engine': active_bundle.predictor.name if active_bundle else None,
+        'price_charts': chart_service.stats(),
+        'vehicle_info_cache': vehicle_info_cache.stats(),
+        'mongodb_pool': database_pool_stats(),
+        'listing_counters': counter_buffer.stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
 @app.route('/model-info')
 def model_info():
-    if not model:
+    bundle = active_bundle
+    if not bundle:
         return jsonify({'error': 'Models not loaded'}), 500
+    tables = bundle.encoding_tables.tables
     info = {
-        'model_type': str(type(model).__name__),
-        'feature_count': len(feature_columns) if feature_columns else 0,
-        'available_encoders': list(encoders.keys()) if encoders else [],
-        'features': feature_columns.tolist() if feature_columns is not None else [],
-        'supported_brands': list(encoders['brand'].classes_) if encoders and 'brand' in encoders else [],
+        'model_type': bundle.manifest.get('model_type') or str(type(bundle.model).__name__),
+        'model_version': bundle.version,
+        'manifest': bundle.manifest,
+        'prediction_engine': bundle.predictor.name,
+        'feature_count': len(bundle.feature_columns),
+        'available_encoders': list(tables.keys()),
+        'features': bundle.feature_columns,
+        'supported_brands': list(tables.get('brand', {})),
         'database_info': {
             'states_covered': len(CAR_DATABASE['registration_patterns']),
             'insurance_providers': len(CAR_DATABASE['insurance_providers']),
@@ -1503,10 +1632,16 @@ if __name__ == '__main__':
         print("  - GET  /car/<listing_id>          : Car details page")
         print("  - POST /predict                   : Web form prediction")
         print("  - POST /api/predict               : JSON API prediction")
+        print("  - POST /api/predict/batch         : Batch JSON API prediction")
         print("  - GET  /api/vehicle-info/<reg_no> : Vehicle info by registration")
+        print("  - POST /api/vehicle-info/bulk     : Fleet compliance status as NDJSON")
+        print("  - GET  /api/compliance            : Stored compliance by state/status/expiry")
         print("  - GET  /api/listings              : Get marketplace listings")
         print("  - GET  /health                    : Health check")
+        print("  - GET  /metrics                   : Prediction cache, engine and DB pool metrics")
         print("  - GET  /model-info                : Model and database information")
+        print("  - GET  /admin/models              : Model registry versions")
+        print("  - POST /admin/models/reload       : Hot-swap the served model version")
         print("\n🔥 Features:")
         print("  ✅ Real-time simulated OLX-like listings")
         print("  ✅ Car price prediction with confidence intervals")
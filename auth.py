@@ -1,6 +1,35 @@
 import hashlib
+import hmac
+import os
 import re
 from datetime import datetime
+from functools import wraps
+
+from flask import jsonify, request, session
+
+# Admin access: an X-Admin-Token header matching ADMIN_TOKEN, or a login session for one of
+# ADMIN_USERNAMES (comma-separated). With neither configured, admin-only routes refuse everyone.
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+ADMIN_USERNAMES = {name.strip() for name in os.environ.get('ADMIN_USERNAMES', '').split(',') if name.strip()}
+
+
+def is_admin_request():
+    """True when the current request carries admin credentials"""
+    token = request.headers.get('X-Admin-Token', '')
+    if ADMIN_TOKEN and token and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return True
+    return session.get('username') in ADMIN_USERNAMES
+
+
+def admin_required(view):
+    """Route decorator answering 403 unless is_admin_request()"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin_request():
+            return jsonify({'error': 'Admin access required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
 
 class Auth:
     def __init__(self, database):
@@ -0,0 +1,163 @@
+"""
+Candidate price models: accuracy vs serving cost.
+
+Every candidate is scored on the notebook's held-out split and measured for
+single-row latency, batch throughput, pickle size, load time and the
+resident memory it adds to a fresh process. Results are written as JSON.
+
+Usage:
+  python -m benchmarks.models
+  python -m benchmarks.models --output model_report.json --rounds 2000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.pipeline import Pipeline
+
+from dataset import TARGET_COLUMN, load_dataset
+from train import FEATURE_COLUMNS, RANDOM_STATE, encode_features, evaluate, split
+
+LEGACY_MODEL = 'best_car_price_model.pkl'
+LEGACY_SCALER = 'car_price_scaler.pkl'
+
+
+def candidates(X_train, y_train):
+    """name -> fitted estimator (the legacy GB is loaded, the rest are trained here)"""
+    # The notebook's fitted scaler is reused as-is, so the linear models see the same inputs
+    scaler = joblib.load(LEGACY_SCALER)
+    models = {
+        'gradient_boosting_legacy': joblib.load(LEGACY_MODEL),
+        'random_forest': RandomForestRegressor(
+            n_estimators=200, max_depth=15, min_samples_split=5,
+            min_samples_leaf=2, random_state=RANDOM_STATE, n_jobs=1
+        ),
+        'hist_gradient_boosting': HistGradientBoostingRegressor(
+            max_iter=300, learning_rate=0.1, random_state=RANDOM_STATE
+        ),
+        'linear_regression': Pipeline([('scaler', scaler), ('model', LinearRegression())]),
+        'ridge': Pipeline([('scaler', scaler), ('model', Ridge(alpha=1.0))])
+    }
+    for name, model in models.items():
+        if name != 'gradient_boosting_legacy':
+            started = time.perf_counter()
+            if isinstance(model, Pipeline):
+                model.named_steps['model'].fit(model.named_steps['scaler'].transform(X_train), y_train)
+            else:
+                model.fit(X_train, y_train)
+            print(f"  trained {name} in {time.perf_counter() - started:.2f}s")
+    return models
+
+
+def single_row_latency(model, X, rounds):
+    """p50/p99 milliseconds for predicting one row at a time"""
+    rows = X.to_numpy()
+    samples = np.empty(rounds)
+    frame = X.iloc[:1].copy()
+    for i in range(rounds):
+        frame.iloc[0] = rows[i % len(rows)]
+        started = time.perf_counter()
+        model.predict(frame)
+        samples[i] = time.perf_counter() - started
+    return {
+        'p50_ms': float(np.percentile(samples, 50) * 1000),
+        'p99_ms': float(np.percentile(samples, 99) * 1000)
+    }
+
+
+def batch_throughput(model, X, rows=10000, repeat=3):
+    """Rows per second for one predict call over a batch of rows"""
+    batch = X.iloc[np.arange(rows) % len(X)]
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        model.predict(batch)
+        best = min(best, time.perf_counter() - started)
+    return rows / best
+
+
+def _rss_bytes():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def _load_in_fresh_process(path, queue):
+    before = _rss_bytes()
+    started = time.perf_counter()
+    joblib.load(path)
+    queue.put({'load_seconds': time.perf_counter() - started, 'rss_bytes': _rss_bytes() - before})
+
+
+def load_cost(path):
+    """Load time and resident memory added, measured in a freshly spawned interpreter"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_load_in_fresh_process, args=(path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def measure(name, model, X_test, y_test, rounds, batch_rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{name}.pkl")
+        joblib.dump(model, path)
+        pickle_bytes = os.path.getsize(path)
+        loaded = load_cost(path)
+    report = {
+        'accuracy': evaluate(y_test, model.predict(X_test)),
+        'single_row': single_row_latency(model, X_test, rounds),
+        'batch_rows_per_sec': batch_throughput(model, X_test, batch_rows),
+        'pickle_bytes': pickle_bytes,
+        'load_seconds': loaded['load_seconds'],
+        'rss_bytes': loaded['rss_bytes']
+    }
+    print(f"{name:>24} | R2 {report['accuracy']['r2']:.4f} | MAE ₹{report['accuracy']['mae']:>9,.0f} | "
+          f"p50 {report['single_row']['p50_ms']:6.2f}ms p99 {report['single_row']['p99_ms']:6.2f}ms | "
+          f"{report['batch_rows_per_sec']:>12,.0f} rows/s | {pickle_bytes / 1e6:7.2f}MB | "
+          f"load {loaded['load_seconds'] * 1000:6.1f}ms | RSS +{loaded['rss_bytes'] / 1e6:6.1f}MB")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark candidate price models")
+    parser.add_argument('--csv', default='Car_details.csv')
+    parser.add_argument('--rounds', type=int, default=1000, help="Single-row predictions per model")
+    parser.add_argument('--batch-rows', type=int, default=10000, help="Rows per batch throughput call")
+    parser.add_argument('--output', default='model_report.json', help="JSON report path")
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.csv)
+    frame, _ = encode_features(dataset.frame)
+    X_train, X_test, y_train, y_test = split(frame[FEATURE_COLUMNS], frame[TARGET_COLUMN])
+
+    print(f"Preparing candidates ({len(X_train):,} train / {len(X_test):,} test rows)...")
+    models = candidates(X_train, y_train)
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'sklearn': sklearn.__version__,
+            'cpus': os.cpu_count(),
+            'dataset_sha256': dataset.csv_sha256
+        },
+        'models': {name: measure(name, model, X_test, y_test, args.rounds, args.batch_rows)
+                   for name, model in models.items()}
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+/predict request path microbenchmarks.
+
+Times each stage of a /predict call in isolation (form parsing, prediction,
+vehicle info cached and uncached, price chart render and cache hit, result.html render) and the whole request through
+the Flask test client. MongoDB is replaced by an in-memory stand-in, so
+no server is needed. Each stage reports a latency distribution and the bytes
+allocated per call (tracemalloc, measured in a separate pass so it does
+not distort the timings).
+
+Usage:
+  python -m benchmarks.request_path
+  python -m benchmarks.request_path --save-baseline baseline.json
+  python -m benchmarks.request_path --compare baseline.json --threshold 0.2
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+import charts
+import database
+import vehicle_info as vehicle_info_module
+
+FORM = {
+    'brand': 'Maruti', 'year': '2018', 'km_driven': '45,000', 'fuel': 'Petrol',
+    'seller_type': 'Individual', 'transmission': 'Manual', 'owner': 'First Owner',
+    'mileage': '21.5', 'engine': '1197', 'max_power': '82', 'seats': '5',
+    'torque_value': '113', 'registration_number': 'KA01AB1234'
+}
+
+
+class LocalDatabase:
+    """In-memory stand-in for database.Database covering the calls the app makes"""
+
+    def __init__(self):
+        self.connection_string = 'memory://'
+        self.database_name = 'benchmark'
+        self.client = None
+        self.users = {}
+        self.cars = {}
+
+    def _store(self, table, document):
+        document.setdefault('_id', uuid.uuid4().hex[:24])
+        table[str(document['_id'])] = document
+        return document['_id']
+
+    def create_user(self, user_data):
+        user_data['created_at'] = datetime.now()
+        return self._store(self.users, user_data)
+
+    def find_user_by_username(self, username):
+        return next((u for u in self.users.values() if u.get('username') == username), None)
+
+    def find_user_by_email(self, email):
+        return next((u for u in self.users.values() if u.get('email') == email), None)
+
+    def find_user_by_id(self, user_id):
+        return self.users.get(str(user_id))
+
+    def update_user(self, user_id, update_data):
+        user = self.users.get(str(user_id))
+        if user is not None:
+            user.update(update_data)
+        return user is not None
+
+    def create_car(self, car_data):
+        car_data['created_at'] = car_data['updated_at'] = datetime.now()
+        return self._store(self.cars, car_data)
+
+    def bulk_insert_cars(self, cars_data):
+        return [self.create_car(car) for car in cars_data]
+
+    def get_all_cars(self, status=None, limit=None, **kwargs):
+        cars = [dict(c) for c in self.cars.values() if not status or c.get('status') == status]
+        return cars[:limit] if limit else cars
+
+    def search_cars(self, filters, **kwargs):
+        return self.get_all_cars()
+
+    def find_car_by_id(self, car_id):
+        car = self.cars.get(str(car_id))
+        return dict(car) if car else None
+
+    def update_car(self, car_id, update_data):
+        car = self.cars.get(str(car_id))
+        if car is not None:
+            car.update(update_data)
+        return car is not None
+
+    def delete_car(self, car_id):
+        return self.cars.pop(str(car_id), None) is not None
+
+    def get_collection_stats(self):
+        return {'users': len(self.users), 'total_cars': len(self.cars)}
+
+
+def load_app():
+    """Import app.py against the in-memory database"""
+    database.Database = LocalDatabase
+    os.environ.setdefault('MONGODB_URI', 'memory://')
+    import app as appmod
+    # The compliance sweep and registry watcher are background work, not request path; keep them
+    # out of the timed section (the sweep also needs a real MongoDB)
+    appmod.compliance_scheduler.interval = 0
+    appmod.MODEL_RELOAD_POLL_SECONDS = 0
+    appmod.load_models()
+    # A fresh chart cache keeps renders from earlier runs out of the measurements
+    appmod.chart_service = charts.ChartService(cache_dir=tempfile.mkdtemp(prefix='chart-bench-'))
+    return appmod
+
+
+def form_for(i):
+    """FORM with a distinct km_driven per call so the prediction cache stays cold"""
+    form = dict(FORM)
+    form['km_driven'] = str(40000 + i)
+    return form
+
+
+def build_stages(appmod):
+    """name -> zero-argument callable for one run of that stage"""
+    counter = itertools.count()
+    client = appmod.app.test_client()
+    brand, year = FORM['brand'], int(FORM['year'])
+    prediction, _ = appmod.predict_car_price(brand, year, 45000, FORM['fuel'], FORM['seller_type'],
+                                             FORM['transmission'], FORM['owner'], 21.5, 1197.0, 82.0, 5, 113.0)
+    real_time_info = appmod.get_car_real_time_info(brand, year, FORM['registration_number'], 21.5, FORM['fuel'])
+    chart_url = f"/charts/price/{brand}/{year}/{charts.round_price(prediction['price'])}.png"
+
+    def form_parse():
+        with appmod.app.test_request_context('/predict', method='POST', data=form_for(next(counter))):
+            return dict(appmod.request.form)
+
+    def predict():
+        return appmod.predict_car_price(brand, year, 40000 + next(counter), FORM['fuel'], FORM['seller_type'],
+                                        FORM['transmission'], FORM['owner'], 21.5, 1197.0, 82.0, 5, 113.0)
+
+    def predict_cached():
+        return appmod.predict_car_price(brand, year, 45000, FORM['fuel'], FORM['seller_type'],
+                                        FORM['transmission'], FORM['owner'], 21.5, 1197.0, 82.0, 5, 113.0)
+
+    def vehicle_info():
+        return appmod.get_car_real_time_info(brand, year, FORM['registration_number'], 21.5, FORM['fuel'])
+
+    def vehicle_info_build():
+        return vehicle_info_module.build_vehicle_info(brand, year, FORM['registration_number'], 21.5, FORM['fuel'])
+
+    def price_chart():
+        return charts.render_price_chart(prediction['price'], brand, year)
+
+    def price_chart_cached():
+        return appmod.chart_service.get(brand, year, prediction['price'])
+
+    def render_result():
+        with appmod.app.test_request_context('/predict', method='POST', data=FORM):
+            return appmod.render_template(
+                'result.html', predicted_price=prediction['price'], prediction_result=prediction,
+                brand=brand, year=year, km_driven=45000, fuel=FORM['fuel'],
+                seller_type=FORM['seller_type'], transmission=FORM['transmission'], owner=FORM['owner'],
+                mileage=21.5, engine=1197.0, max_power=82.0, seats=5, torque_value=113.0,
+                car_age=2024 - year, depreciation_rate=(2024 - year) * 8,
+                prediction_date=datetime.now().strftime('%d-%m-%Y %H:%M'),
+                real_time_info=real_time_info, price_chart_url=chart_url)
+
+    def end_to_end():
+        response = client.post('/predict', data=form_for(next(counter)))
+        if response.status_code != 200:
+            raise RuntimeError(f"/predict returned {response.status_code}")
+        return response
+
+    return {
+        'form_parse': form_parse,
+        'predict': predict,
+        'predict_cached': predict_cached,
+        'vehicle_info': vehicle_info,
+        'vehicle_info_build': vehicle_info_build,
+        'price_chart': price_chart,
+        'price_chart_cached': price_chart_cached,
+        'render_result': render_result,
+        'end_to_end': end_to_end
+    }
+
+
+def time_stage(func, rounds, warmup):
+    for _ in range(warmup):
+        func()
+    samples = np.empty(rounds)
+    for i in range(rounds):
+        started = time.perf_counter()
+        func()
+        samples[i] = time.perf_counter() - started
+    samples *= 1000
+    return {
+        'rounds': rounds,
+        'mean_ms': float(samples.mean()),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p90_ms': float(np.percentile(samples, 90)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'max_ms': float(samples.max())
+    }
+
+
+def allocations(func, rounds=5):
+    """Mean bytes still held after a call, and the largest transient peak above the starting point"""
+    tracemalloc.start()
+    try:
+        retained = peak = 0
+        for _ in range(rounds):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            func()
+            after, high = tracemalloc.get_traced_memory()
+            retained += max(0, after - before)
+            peak = max(peak, high - before)
+    finally:
+        tracemalloc.stop()
+    return {'retained_bytes': retained // rounds, 'peak_bytes': peak}
+
+
+def run(stages, rounds, warmup, only=None):
+    report = {}
+    for name, func in stages.items():
+        if only and name not in only:
+            continue
+        # Chart and end-to-end runs are 100x slower than the rest; keep wall time sane
+        stage_rounds = max(10, rounds // 10) if name in ('price_chart', 'render_result', 'end_to_end') else rounds
+        report[name] = {**time_stage(func, stage_rounds, warmup), **allocations(func)}
+        result = report[name]
+        print(f"{name:>16} | p50 {result['p50_ms']:8.3f}ms | p90 {result['p90_ms']:8.3f}ms | "
+              f"p99 {result['p99_ms']:8.3f}ms | peak {result['peak_bytes'] / 1024:9.1f}KiB")
+    return report
+
+
+def compare(report, baseline, threshold):
+    """Stages whose p50 regressed by more than threshold (a fraction) against baseline"""
+    regressions = []
+    print(f"\n{'stage':>16} | {'baseline p50':>12} | {'current p50':>12} | change")
+    for name, result in report.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['p50_ms'], result['p50_ms']
+        change = (after - before) / before if before else 0.0
+        flag = ' ❌' if change > threshold else ''
+        print(f"{name:>16} | {before:10.3f}ms | {after:10.3f}ms | {change:+7.1%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the /predict request path")
+    parser.add_argument('--rounds', type=int, default=200, help="Timed calls per fast stage")
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--stages', nargs='+', default=None, help="Only run these stages")
+    parser.add_argument('--save-baseline', metavar='PATH', help="Write this run as a baseline")
+    parser.add_argument('--compare', metavar='PATH', help="Compare p50s against a saved baseline")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed p50 regression (default 0.2 = 20%%)")
+    parser.add_argument('--output', metavar='PATH', help="Write the JSON report here")
+    args = parser.parse_args()
+
+    appmod = load_app()
+    report = run(build_stages(appmod), args.rounds, args.warmup, args.stages)
+    document = {
+        'environment': {'python': platform.python_version(), 'cpus': os.cpu_count(),
+                        'created_at': datetime.now().isoformat()},
+        'stages': report
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"✅ Report written to {path}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['stages']
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"❌ Regressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Cold-start profiler for app.py.
+
+Starts a fresh interpreter and times the phases of getting the app ready to
+serve: importing app.py, loading the models and answering the first
+/predict. A second interpreter run with -X importtime shows where import
+time went, by top-level package and by the slowest individual modules.
+
+The first load of a model writes its serving snapshot, so run this twice
+after changing models: the second run is the steady-state cold start.
+
+Usage:
+  python -m benchmarks.startup
+  python -m benchmarks.startup --budget 1.0 --top 25
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+PREDICT_FORM = {
+    'brand': 'Maruti', 'year': '2018', 'km_driven': '45000', 'fuel': 'Petrol',
+    'seller_type': 'Individual', 'transmission': 'Manual', 'owner': 'First Owner',
+    'mileage': '21.5', 'engine': '1197', 'max_power': '82', 'seats': '5', 'torque_value': '113'
+}
+
+PHASE_MARKER = 'STARTUP-PHASES '
+# Written to stderr once the app is ready, splitting importtime output into startup and first-request imports
+READY_MARKER = 'STARTUP-READY'
+
+
+def child():
+    """Runs inside the profiled interpreter; prints phase timings as one JSON line"""
+    phases = {}
+    started = time.perf_counter()
+    import app as appmod
+    phases['import_app'] = time.perf_counter() - started
+
+    mark = time.perf_counter()
+    if not appmod.load_models():
+        raise SystemExit("Model loading failed")
+    phases['load_models'] = time.perf_counter() - mark
+    phases['ready'] = time.perf_counter() - started
+    print(READY_MARKER, file=sys.stderr, flush=True)
+
+    mark = time.perf_counter()
+    response = appmod.app.test_client().post('/predict', data=PREDICT_FORM)
+    phases['first_predict'] = time.perf_counter() - mark
+    phases['first_predict_status'] = response.status_code
+    print(PHASE_MARKER + json.dumps(phases), flush=True)
+
+
+def parse_importtime(stderr):
+    """(module, self_us, cumulative_us, depth) rows from -X importtime output, before and after ready"""
+    startup, first_request = [], []
+    rows = startup
+    for line in stderr.splitlines():
+        if line.strip() == READY_MARKER:
+            rows = first_request
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return startup, first_request
+
+
+def _run_child(env, importtime):
+    flags = ['-X', 'importtime'] if importtime else []
+    result = subprocess.run([sys.executable, *flags, '-m', 'benchmarks.startup', '--child'],
+                            capture_output=True, text=True, env=env)
+    phases = None
+    for line in result.stdout.splitlines():
+        if line.startswith(PHASE_MARKER):
+            phases = json.loads(line[len(PHASE_MARKER):])
+    if result.returncode != 0 or phases is None:
+        sys.stderr.write(result.stderr[-4000:])
+        raise SystemExit("❌ Profiled interpreter failed")
+    return phases, result.stderr
+
+
+def profile(env=None):
+    """Phase timings from a plain fresh interpreter, and import rows from a second -X importtime run"""
+    env = dict(os.environ, **(env or {}))
+    env.setdefault('MONGODB_URI', 'mongodb://localhost:27017')
+    # importtime's own bookkeeping inflates wall time, so phases come from a separate run
+    phases, _ = _run_child(env, importtime=False)
+    _, stderr = _run_child(env, importtime=True)
+    return phases, parse_importtime(stderr)
+
+
+def by_package(rows):
+    """Self import time summed per top-level package, in seconds"""
+    totals = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        totals[name.split('.')[0]] += self_us
+    return sorted(((package, us / 1e6) for package, us in totals.items()), key=lambda item: -item[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile app.py cold start")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--top', type=int, default=15, help="Packages/modules to list")
+    parser.add_argument('--budget', type=float, default=1.0, help="Seconds allowed until ready (default 1.0)")
+    parser.add_argument('--output', metavar='PATH', help="Write the JSON report here")
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    phases, (rows, deferred) = profile()
+    print("Phases:")
+    for name in ('import_app', 'load_models', 'ready', 'first_predict'):
+        print(f"  {name:<14} {phases[name] * 1000:8.1f}ms")
+
+    packages = by_package(rows)
+    print(f"\nImport time until ready, by package (top {args.top}):")
+    for package, seconds in packages[:args.top]:
+        print(f"  {package:<24} {seconds * 1000:8.1f}ms")
+
+    deferred_packages = by_package(deferred)
+    print(f"\nImported lazily by the first /predict (top {args.top}):")
+    for package, seconds in deferred_packages[:args.top]:
+        print(f"  {package:<24} {seconds * 1000:8.1f}ms")
+
+    slowest = sorted(rows, key=lambda row: -row[1])[:args.top]
+    print(f"\nSlowest modules by self time (top {args.top}):")
+    for name, self_us, cumulative_us, _ in slowest:
+        print(f"  {name:<40} self {self_us / 1000:7.1f}ms  cumulative {cumulative_us / 1000:7.1f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'phases': phases,
+                       'packages': dict(packages),
+                       'first_request_packages': dict(deferred_packages),
+                       'modules': [{'module': name, 'self_us': s, 'cumulative_us': c}
+                                   for name, s, c, _ in rows]}, f, indent=2)
+        print(f"\n✅ Report written to {args.output}")
+
+    status = '✅' if phases['ready'] <= args.budget else '❌'
+    print(f"\n{status} Ready to serve in {phases['ready']:.3f}s (budget {args.budget:.1f}s)")
+    if phases['ready'] > args.budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Bulk Valuation Script
+Re-value dealer dumps in the Car_details.csv format without loading them
+into memory: the input is read in fixed-size chunks, each chunk is cleaned
+and predicted in one vectorized pass, and results are streamed to the output.
+
+Usage:
+  python bulk_valuation.py dealer_dump.csv -o valued.csv
+  python bulk_valuation.py dealer_dump.csv -o valued.ndjson --format ndjson --workers 4
+  python bulk_valuation.py dealer_dump.csv -o - --chunk-size 5000 > valued.csv
+"""
+
+import argparse
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from model_registry import ModelRegistry
+from prediction import predict_batch
+from preprocessing import prepare_cars, training_fill_values
+
+# Per-process state, filled by _init_worker
+_bundle = None
+_fill_values = None
+
+
+def _init_worker(version, engine, registry_dir, fill_values):
+    """Load the model bundle once per worker process"""
+    global _bundle, _fill_values
+    _bundle = ModelRegistry(registry_dir).load(version, engine)
+    _fill_values = fill_values
+
+
+def _torque_units(bundle):
+    """Torque convention the model was trained with (legacy models used raw numbers)"""
+    return bundle.manifest.get('torque_units', 'raw')
+
+
+def value_chunk(chunk):
+    """Original rows plus predicted_price and error columns"""
+    cars = prepare_cars(chunk, _fill_values, _torque_units(_bundle))
+    results = predict_batch(cars.to_dict('records'), _bundle.predictor,
+                            _bundle.encoding_tables, _bundle.feature_columns)
+    valued = chunk.copy()
+    valued['predicted_price'] = [round(float(result['price']), 2) if result else None
+                                 for result, _ in results]
+    valued['error'] = [error for _, error in results]
+    return valued
+
+
+class ChunkWriter:
+    """Streams valued chunks to CSV or NDJSON"""
+
+    def __init__(self, stream, output_format):
+        self.stream = stream
+        self.output_format = output_format
+        self.header_written = False
+
+    def write(self, frame):
+        if self.output_format == 'ndjson':
+            frame.to_json(self.stream, orient='records', lines=True, force_ascii=False)
+            if len(frame):
+                self.stream.write('\n')
+        else:
+            frame.to_csv(self.stream, index=False, header=not self.header_written)
+            self.header_written = True
+        self.stream.flush()
+
+
+def _reference_fill_values(bundle, reference_csv):
+    """Fill values recorded with the model, else recomputed from the training CSV"""
+    if 'fill_values' in bundle.manifest:
+        return bundle.manifest['fill_values']
+    return training_fill_values(pd.read_csv(reference_csv), _torque_units(bundle))
+
+
+def run(input_path, output, output_format='csv', chunk_size=10000, workers=1,
+        version=None, engine='compiled', registry_dir='models', reference_csv='Car_details.csv'):
+    """Value every row of input_path and stream the results to the output stream"""
+    bundle = ModelRegistry(registry_dir).load(version, engine)
+    fill_values = _reference_fill_values(bundle, reference_csv)
+    print(f"Valuing {input_path} with model {bundle.version} "
+          f"({workers} worker{'s' if workers != 1 else ''}, {chunk_size} rows per chunk)", file=sys.stderr)
+
+    writer = ChunkWriter(output, output_format)
+    chunks = pd.read_csv(input_path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+    started = time.perf_counter()
+    rows = failed = 0
+
+    def record(valued):
+        nonlocal rows, failed
+        writer.write(valued)
+        rows += len(valued)
+        failed += int(valued['error'].notna().sum())
+        elapsed = time.perf_counter() - started
+        print(f"  {rows:,} rows valued ({rows / elapsed:,.0f} rows/sec)", file=sys.stderr)
+
+    if workers <= 1:
+        global _bundle, _fill_values
+        _bundle, _fill_values = bundle, fill_values
+        for chunk in chunks:
+            record(value_chunk(chunk))
+    else:
+        # Pin workers to the version loaded above, even if ACTIVE moves mid-run
+        pinned_version = None if bundle.manifest.get('source') == 'legacy' else bundle.version
+        # At most two chunks per worker in flight keeps memory bounded and output ordered
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(pinned_version, engine, registry_dir, fill_values)) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(value_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    record(pending.popleft().result())
+            while pending:
+                record(pending.popleft().result())
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Valued {rows:,} rows ({failed:,} with errors) in {elapsed:.2f}s "
+          f"- {rows / elapsed if elapsed else 0:,.0f} rows/sec", file=sys.stderr)
+    return rows, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk car valuation for Car_details.csv-style files")
+    parser.add_argument('input', help="CSV file in the Car_details.csv format")
+    parser.add_argument('-o', '--output', default='-', help="Output file, '-' for stdout (default)")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv', dest='output_format')
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Rows per chunk (default 10000)")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes (default 1)")
+    parser.add_argument('--model-version', default=None, help="Registry version (default: active)")
+    parser.add_argument('--engine', choices=['compiled', 'sklearn'], default='compiled')
+    parser.add_argument('--registry', default='models', help="Model registry directory")
+    parser.add_argument('--reference', default='Car_details.csv',
+                        help="Training CSV used for missing-value medians when the model has none recorded")
+    args = parser.parse_args()
+
+    if args.output == '-':
+        output = sys.stdout
+    else:
+        output = open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        run(args.input, output, args.output_format, args.chunk_size, args.workers,
+            args.model_version, args.engine, args.registry, args.reference)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
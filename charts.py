@@ -0,0 +1,184 @@
+"""
+Price comparison charts, rendered off the request thread.
+
+/predict only hands out a chart URL and queues the render; the PNG is
+served by its own route. matplotlib's rcParams are process-global and the
+style is read throughout drawing (ticks are created lazily, tight_layout and
+bbox_inches='tight' redraw), so renders run one at a time on a single
+background thread per process. Rendered bytes are cached in memory (LRU) and on
+disk, keyed by (brand, year, price rounded to CHART_PRICE_STEP), so a chart
+is drawn once per key and shared by every worker on the machine.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+CHART_CACHE_DIR = os.environ.get('CHART_CACHE_DIR', os.path.join('.cache', 'charts'))
+CHART_CACHE_SIZE = int(os.environ.get('CHART_CACHE_SIZE', 256))
+# Renders queued beyond this are dropped; the image route draws them on demand
+CHART_MAX_PENDING = int(os.environ.get('CHART_MAX_PENDING', 64))
+# Bar labels show lakhs to one decimal, so prices closer than this draw the same chart
+CHART_PRICE_STEP = 10000
+CHART_STYLE = 'seaborn-v0_8'
+COMPARISON_BRANDS = ['Maruti', 'Hyundai', 'Honda', 'Toyota', 'Tata']
+
+# Also guards render_price_chart calls made outside ChartService
+_render_lock = threading.Lock()
+
+
+def round_price(price):
+    return int(round(float(price) / CHART_PRICE_STEP) * CHART_PRICE_STEP)
+
+
+def render_price_chart(predicted_price, brand, year):
+    """PNG bytes of the price comparison bar chart for one prediction"""
+    from matplotlib import style
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+    import matplotlib
+    import numpy as np
+
+    brands = list(COMPARISON_BRANDS)
+    if brand not in brands:
+        brands[0] = brand
+    rng = np.random.RandomState(42)
+    prices = [predicted_price if b == brand else predicted_price * rng.uniform(0.7, 1.3) for b in brands]
+
+    with _render_lock, matplotlib.rc_context(style.library[CHART_STYLE]):
+        fig = Figure(figsize=(10, 6))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        colors = ['#FF6B6B' if b == brand else '#4ECDC4' for b in brands]
+        bars = ax.bar(brands, prices, color=colors, alpha=0.8)
+        for b, bar in zip(brands, bars):
+            if b == brand:
+                bar.set_edgecolor('#FF6B6B')
+                bar.set_linewidth(3)
+        ax.set_title(f'Price Comparison - {brand} {year}', fontsize=16, fontweight='bold')
+        ax.set_ylabel('Price (₹)', fontsize=12)
+        ax.set_xlabel('Car Brands', fontsize=12)
+        ax.yaxis.set_major_formatter(FuncFormatter(lambda x, p: f'₹{x/100000:.1f}L'))
+        for bar, price in zip(bars, prices):
+            ax.text(bar.get_x() + bar.get_width() / 2., bar.get_height(),
+                    f'₹{price/100000:.1f}L', ha='center', va='bottom', fontweight='bold')
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+        img = io.BytesIO()
+        fig.savefig(img, format='png', dpi=150, bbox_inches='tight')
+    return img.getvalue()
+
+
+class ChartService:
+    """Single render thread with a bounded queue, in front of a memory LRU and a disk cache"""
+
+    def __init__(self, cache_dir=CHART_CACHE_DIR, cache_size=CHART_CACHE_SIZE,
+                 max_pending=CHART_MAX_PENDING, ttl=86400):
+        self.cache_dir = cache_dir
+        self.max_pending = max_pending
+        self.memory = TTLCache(maxsize=cache_size, ttl=ttl)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.renders = 0
+        self.dropped = 0
+
+    @staticmethod
+    def key(brand, year, price):
+        return (str(brand), int(year), round_price(price))
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.png")
+
+    def _pool(self):
+        # Executor threads don't survive fork; gunicorn workers each start their own
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chart')
+            self._pending = {}
+            self._pid = os.getpid()
+        return self._executor
+
+    def cached(self, key):
+        """PNG bytes from memory or disk, or None"""
+        png = self.memory.get(key)
+        if png is not None:
+            return png
+        try:
+            with open(self._path(key), 'rb') as f:
+                png = f.read()
+        except OSError:
+            return None
+        self.memory.set(key, png)
+        return png
+
+    def _render(self, key):
+        try:
+            png = self.cached(key)
+            if png is None:
+                brand, year, price = key
+                png = render_price_chart(price, brand, year)
+                self.renders += 1
+                self.memory.set(key, png)
+                self._write(key, png)
+            return png
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _write(self, key, png):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, staging = tempfile.mkstemp(prefix='.chart-', dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(png)
+            os.replace(staging, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not write chart cache file: {e}")
+
+    def _submit(self, key, force=False):
+        with self._lock:
+            pool = self._pool()
+            future = self._pending.get(key)
+            if future is None:
+                if not force and len(self._pending) >= self.max_pending:
+                    self.dropped += 1
+                    return None
+                future = pool.submit(self._render, key)
+                self._pending[key] = future
+            return future
+
+    def prefetch(self, brand, year, price):
+        """Queue a render for the chart if it isn't cached yet; never blocks"""
+        key = self.key(brand, year, price)
+        if self.memory.get(key) is None:
+            self._submit(key)
+        return key
+
+    def get(self, brand, year, price, timeout=30):
+        """PNG bytes for the chart, waiting on (or starting) its render if needed"""
+        key = self.key(brand, year, price)
+        png = self.cached(key)
+        if png is not None:
+            return png
+        return self._submit(key, force=True).result(timeout)
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'pending': pending,
+            'renders': self.renders,
+            'dropped': self.dropped,
+            'memory_cache': self.memory.stats()
+        }
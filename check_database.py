@@ -8,12 +8,12 @@ and to view all stored user data.
 import sys
 import json
 from datetime import datetime
-from database import Database
+from database import QUERY_SHAPES, get_database
 from bson import ObjectId
 
 class DatabaseChecker:
     def __init__(self):
-        self.db = Database()
+        self.db = get_database()
     
     def check_connection(self):
         """Test database connection"""
@@ -143,6 +143,41 @@ class DatabaseChecker:
             print(f"❌ Export failed: {e}")
             return False
     
+    def backfill_search_fields(self, batch_size=1000):
+        """Fill the lowercase shadow fields searches match against, for documents that predate them"""
+        try:
+            print(f"\n🔡 Backfilling search fields ({batch_size} documents per batch):")
+            updated = self.db.backfill_search_fields(batch_size)
+            print(f"✅ Search fields up to date: {', '.join(f'{name} {count} updated' for name, count in updated.items())}")
+            return True
+        except Exception as e:
+            print(f"❌ Backfill failed: {e}")
+            return False
+    
+    def verify_indexes(self):
+        """Explain every query shape the app issues; False if any of them scans a whole collection"""
+        try:
+            self.db.ensure_indexes()
+            print(f"\n🔎 Query plans ({len(QUERY_SHAPES)} shapes):")
+            scans = []
+            for collection_name, description, query, sort in QUERY_SHAPES:
+                cursor = self.db.db[collection_name].find(query)
+                if sort:
+                    cursor = cursor.sort(sort)
+                stages = plan_stages(cursor.explain())
+                status = '❌' if 'COLLSCAN' in stages else '✅'
+                print(f"   {status} {collection_name}: {description} -> {' > '.join(stages)}")
+                if 'COLLSCAN' in stages:
+                    scans.append(f"{collection_name}: {description}")
+            if scans:
+                print(f"\n❌ {len(scans)} query shape(s) fall back to COLLSCAN")
+                return False
+            print("\n✅ Every query shape uses an index")
+            return True
+        except Exception as e:
+            print(f"❌ Index verification failed: {e}")
+            return False
+    
     def run_full_check(self):
         """Run all checks"""
         print("🔍 Starting Database Verification...")
@@ -167,6 +202,22 @@ class DatabaseChecker:
         print("✅ Database verification completed!")
         return True
 
+def plan_stages(explain):
+    """Stage names of the winning plan, outermost first (classic and slot-based explain formats)"""
+    planner = explain.get('queryPlanner', explain)
+    plan = planner.get('winningPlan', {})
+    plan = plan.get('queryPlan', plan)
+    stages = []
+    pending = [plan]
+    while pending:
+        node = pending.pop(0)
+        if 'stage' in node:
+            stages.append(node['stage'])
+        if 'inputStage' in node:
+            pending.append(node['inputStage'])
+        pending.extend(node.get('inputStages', []))
+    return stages
+
 def main():
     checker = DatabaseChecker()
     
@@ -183,6 +234,11 @@ def main():
         elif command == "export":
             filename = sys.argv[2] if len(sys.argv) > 2 else "users_export.json"
             checker.export_users_json(filename)
+        elif command == "backfill-search-fields":
+            batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+            sys.exit(0 if checker.backfill_search_fields(batch_size) else 1)
+        elif command == "indexes":
+            sys.exit(0 if checker.verify_indexes() else 1)
         elif command == "stats":
             checker.check_connection()
             checker.get_database_info()
@@ -195,6 +251,8 @@ def main():
             print("  python check_database.py search <username/email>  # Search user")
             print("  python check_database.py export [filename]        # Export to JSON")
             print("  python check_database.py stats        # Show database stats")
+            print("  python check_database.py indexes      # Create indexes, fail on COLLSCAN query plans")
+            print("  python check_database.py backfill-search-fields [batch]  # Fill lowercase search fields")
     else:
         # Run full check by default
         checker.run_full_check()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Materialized compliance status for listed cars.
+
+A sweep reads the cars collection in cursor batches, computes each car's
+insurance/PUC/RC/fitness status and compliance score with
+vehicle_info.compliance_record, and upserts the results into the indexed
+`compliance` collection with one unordered bulk_write per batch. Expiry
+dates are stored as datetimes, so "expired" and "expiring within N days"
+queries stay correct between sweeps.
+
+Sweeps run on a schedule inside the app (one process at a time, coordinated
+through a lease document) or from the command line.
+
+Usage:
+  python compliance.py sweep [--batch-size 500]
+  python compliance.py query --state KA --document puc --status expired
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from vehicle_info import CAR_DATABASE, compliance_record
+
+logger = logging.getLogger(__name__)
+
+COMPLIANCE_COLLECTION = 'compliance'
+# Cars read and written per round trip
+COMPLIANCE_BATCH_SIZE = int(os.environ.get('COMPLIANCE_BATCH_SIZE', 500))
+# Seconds between scheduled sweeps; 0 disables the in-app scheduler
+COMPLIANCE_SWEEP_INTERVAL = float(os.environ.get('COMPLIANCE_SWEEP_INTERVAL', 6 * 3600))
+COMPLIANCE_QUERY_LIMIT = 500
+DOCUMENTS = ('insurance', 'puc', 'registration', 'fitness')
+
+# Listing cities to RTO state codes; anything else falls back to registration_state or 'KA'
+CITY_STATE_CODES = {
+    'Bangalore': 'KA', 'Bengaluru': 'KA', 'Mangalore': 'KA', 'Puttur': 'KA', 'Mysore': 'KA',
+    'Delhi': 'DL', 'Mumbai': 'MH', 'Pune': 'MH', 'Chennai': 'TN', 'Kolkata': 'WB',
+    'Ahmedabad': 'GJ', 'Jaipur': 'RJ', 'Lucknow': 'UP', 'Chandigarh': 'PB', 'Kochi': 'KL'
+}
+DEFAULT_STATE_CODE = 'KA'
+# State names (lowercase) to codes, so state filters can match the indexed state_code exactly
+STATE_CODES_BY_NAME = {name.lower(): code for code, name in CAR_DATABASE['registration_patterns'].items()}
+# Values of overall_status (vehicle_info.get_overall_status), by lowercase
+OVERALL_STATUSES = {status.lower(): status for status in ('Fully Compliant', 'Partially Compliant', 'Non-Compliant')}
+
+CAR_FIELDS = {'brand': 1, 'model': 1, 'year': 1, 'fuel': 1, 'mileage': 1, 'location': 1,
+              'status': 1, 'registration_number': 1, 'registration_state': 1}
+
+INDEXES = [
+    [('state_code', 1), ('overall_status', 1)],
+    [('state_code', 1), ('next_expiry', 1)],
+    [('swept_at', 1)]
+] + [[('state_code', 1), (f'{document}.expires_at', 1)] for document in DOCUMENTS]
+
+
+def state_code_for(car):
+    """Two-letter RTO code for a listing, from its location or registration_state"""
+    code = CITY_STATE_CODES.get(str(car.get('location', '')).strip().title())
+    if code:
+        return code
+    match = re.search(r'\(([A-Z]{2})\)', str(car.get('registration_state', '')))
+    if match and match.group(1) in CAR_DATABASE['registration_patterns']:
+        return match.group(1)
+    return DEFAULT_STATE_CODE
+
+
+def registration_number_for(car):
+    """The listing's plate, else one derived from its _id so every sweep assigns the same plate"""
+    plate = str(car.get('registration_number') or '').strip().upper()
+    if len(plate) >= 8:
+        return plate
+    rng = random.Random(int.from_bytes(hashlib.sha256(str(car['_id']).encode()).digest()[:8], 'big'))
+    return (f"{state_code_for(car)}{rng.randint(1, 99):02d}"
+            f"{rng.choice('ABCDEFGH')}{rng.randint(1000, 9999)}")
+
+
+def _number(value, default):
+    """Leading number of values like 2018, '14.8 kmpl' or '2,018'"""
+    match = re.search(r'\d+(\.\d+)?', str(value).replace(',', ''))
+    return float(match.group()) if match else default
+
+
+def compliance_document(car, as_of, swept_at):
+    """The compliance collection document for one car"""
+    year = int(_number(car.get('year'), 2018))
+    registration_number = registration_number_for(car)
+    record = compliance_record(registration_number, str(car.get('brand', 'Maruti')), year,
+                               _number(car.get('mileage'), 15.0), str(car.get('fuel', 'Petrol')), as_of)
+    current_date = datetime.combine(as_of, datetime.min.time())
+    document = {
+        '_id': car['_id'],
+        'car_id': str(car['_id']),
+        'registration_number': registration_number,
+        'state_code': registration_number[:2],
+        'state': record['state'],
+        'brand': car.get('brand'),
+        'model': car.get('model'),
+        'year': year,
+        'listing_status': car.get('status'),
+        'overall_status': record['overall_status'],
+        'compliance_score': record['compliance_score'],
+        'alerts': record['alerts'],
+        'as_of': current_date,
+        'swept_at': swept_at
+    }
+    upcoming = []
+    for name in DOCUMENTS:
+        status = dict(record[name])
+        expiry = status.pop('expiry_date')
+        status['expires_at'] = datetime.strptime(expiry, '%d-%m-%Y') if expiry else None
+        if status['expires_at'] and status['expires_at'] >= current_date:
+            upcoming.append(status['expires_at'])
+        document[name] = status
+    # Soonest renewal still ahead, for "expiring within N days" across all documents
+    document['next_expiry'] = min(upcoming) if upcoming else None
+    return document
+
+
+def ensure_indexes(collection):
+    for keys in INDEXES:
+        collection.create_index(keys)
+
+
+def sweep(db, batch_size=COMPLIANCE_BATCH_SIZE, as_of=None):
+    """Recompute every car's compliance document; returns counts and timing"""
+    from pymongo import ReplaceOne
+
+    as_of = as_of or date.today()
+    collection = db.db[COMPLIANCE_COLLECTION]
+    ensure_indexes(collection)
+    started = time.perf_counter()
+    swept_at = datetime.now()
+    cars = written = 0
+    failed = []
+    batch = []
+
+    def flush():
+        nonlocal written
+        if batch:
+            result = collection.bulk_write(batch, ordered=False)
+            written += result.upserted_count + result.matched_count
+            batch.clear()
+
+    cursor = db.cars_collection.find({}, CAR_FIELDS, batch_size=batch_size)
+    try:
+        for car in cursor:
+            cars += 1
+            try:
+                document = compliance_document(car, as_of, swept_at)
+            except Exception as e:
+                failed.append(car['_id'])
+                logger.warning(f"Skipping compliance for car {car.get('_id')}: {e}")
+                continue
+            batch.append(ReplaceOne({'_id': document['_id']}, document, upsert=True))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        cursor.close()
+    # Cars deleted since the last sweep; cars that failed this pass keep their previous entry
+    stale = {'swept_at': {'$lt': swept_at}}
+    if failed:
+        stale['_id'] = {'$nin': failed}
+    removed = collection.delete_many(stale).deleted_count
+    stats = {'cars': cars, 'written': written, 'failed': len(failed), 'removed': removed,
+             'as_of': as_of.isoformat(), 'seconds': round(time.perf_counter() - started, 3)}
+    logger.info(f"Compliance sweep: {stats}")
+    return stats
+
+
+def normalize_state(state):
+    """RTO code for a state given as a code (ka) or a name (Karnataka); raises ValueError if unknown"""
+    state = state.strip()
+    if len(state) == 2 and state.isalpha():
+        return state.upper()
+    code = STATE_CODES_BY_NAME.get(' '.join(state.lower().split()))
+    if code is None:
+        raise ValueError(f"Unknown state: {state}")
+    return code
+
+
+def query_filter(state=None, status=None, document=None, expiring_within=None, now=None):
+    """Mongo filter for the compliance query parameters; raises ValueError on bad input"""
+    now = now or datetime.now()
+    today = datetime.combine(now.date(), datetime.min.time())
+    query = {}
+    if state:
+        query['state_code'] = normalize_state(state)
+    if document and document not in DOCUMENTS:
+        raise ValueError(f"document must be one of {', '.join(DOCUMENTS)}")
+    if status:
+        if document:
+            # Judged against today rather than the sweep date, so results never go stale
+            if status.lower() == 'expired':
+                query[f'{document}.expires_at'] = {'$lt': today}
+            elif status.lower() in ('valid', 'active'):
+                query[f'{document}.expires_at'] = {'$gte': today}
+            elif status.lower() == 'not required':
+                query[f'{document}.expires_at'] = None
+            else:
+                raise ValueError("status must be expired, valid or not required when a document is given")
+        else:
+            overall = OVERALL_STATUSES.get(' '.join(status.lower().split()))
+            if overall is None:
+                raise ValueError(f"status must be one of {', '.join(OVERALL_STATUSES.values())}")
+            query['overall_status'] = overall
+    if expiring_within is not None:
+        if expiring_within < 0:
+            raise ValueError('expiring_within must be a number of days >= 0')
+        field = f'{document}.expires_at' if document else 'next_expiry'
+        window = {'$gte': today, '$lte': today + timedelta(days=expiring_within)}
+        if field in query:
+            query = {'$and': [query, {field: window}]}
+        else:
+            query[field] = window
+    return query
+
+
+def query(db, state=None, status=None, document=None, expiring_within=None, limit=50, skip=0):
+    """Matching compliance documents, soonest expiry first, and the total match count"""
+    from pymongo import ASCENDING
+
+    collection = db.db[COMPLIANCE_COLLECTION]
+    criteria = query_filter(state, status, document, expiring_within)
+    sort_field = f'{document}.expires_at' if document else 'next_expiry'
+    cursor = (collection.find(criteria, {'swept_at': 0})
+              .sort([(sort_field, ASCENDING), ('_id', ASCENDING)])
+              .skip(skip).limit(min(limit, COMPLIANCE_QUERY_LIMIT)))
+    results = []
+    for entry in cursor:
+        entry['_id'] = str(entry['_id'])
+        results.append(entry)
+    return {'count': collection.count_documents(criteria), 'results': results}
+
+
+class ComplianceScheduler:
+    """Runs sweep() every interval seconds in a daemon thread, one process at a time"""
+
+    def __init__(self, get_db, interval=COMPLIANCE_SWEEP_INTERVAL, batch_size=COMPLIANCE_BATCH_SIZE):
+        self.get_db = get_db
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_run = None
+        self._pid = None
+
+    def _acquire_lease(self, db):
+        """True if this process may sweep now; the lease makes other workers skip this interval"""
+        from pymongo.errors import DuplicateKeyError
+
+        now = datetime.now()
+        try:
+            db.db['compliance_runs'].find_one_and_update(
+                {'_id': 'sweep', 'lease_until': {'$lt': now}},
+                {'$set': {'lease_until': now + timedelta(seconds=self.interval), 'holder': os.getpid()}},
+                upsert=True)
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def run_once(self):
+        db = self.get_db()
+        if not self._acquire_lease(db):
+            return None
+        self.last_run = sweep(db, self.batch_size)
+        return self.last_run
+
+    def start(self):
+        """Start the sweep thread for this process (a no-op if already running or disabled)"""
+        if self._pid == os.getpid() or self.interval <= 0:
+            return
+        self._pid = os.getpid()
+
+        def loop():
+            while True:
+                try:
+                    self.run_once()
+                except Exception as e:
+                    logger.error(f"Compliance sweep failed: {e}")
+                time.sleep(self.interval)
+
+        threading.Thread(target=loop, name='compliance-sweep', daemon=True).start()
+
+
+def main():
+    from database import get_database
+
+    parser = argparse.ArgumentParser(description="Materialized compliance status for listed cars")
+    commands = parser.add_subparsers(dest='command', required=True)
+    sweep_parser = commands.add_parser('sweep', help="Recompute the compliance collection now")
+    sweep_parser.add_argument('--batch-size', type=int, default=COMPLIANCE_BATCH_SIZE)
+    query_parser = commands.add_parser('query', help="Query the compliance collection")
+    query_parser.add_argument('--state', help="State code (KA) or name (Karnataka)")
+    query_parser.add_argument('--status', help="Overall status, or expired/valid with --document")
+    query_parser.add_argument('--document', choices=DOCUMENTS)
+    query_parser.add_argument('--expiring-within', type=int, metavar='DAYS')
+    query_parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = get_database()
+    if args.command == 'sweep':
+        print(json.dumps(sweep(db, args.batch_size), indent=2))
+    else:
+        result = query(db, args.state, args.status, args.document, args.expiring_within, args.limit)
+        print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
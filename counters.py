@@ -0,0 +1,137 @@
+"""
+Write-behind buffer for listing view/favorite counters.
+
+Page views only add deltas to an in-process dict keyed by listing; a
+daemon thread flushes the accumulated deltas every COUNTER_FLUSH_INTERVAL
+seconds as $inc updates in one unordered bulk_write, so a burst of views on
+a listing costs one write instead of one per view. Increments are never
+read-modify-write, so concurrent workers don't lose counts.
+
+Memory is bounded by COUNTER_BUFFER_SIZE listings: a new listing arriving
+at a full buffer flushes it on the spot. Buffered deltas are also flushed
+at interpreter exit and by gunicorn's worker_exit hook; a hard kill loses
+at most one interval of counts.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Seconds between flushes; 0 writes every increment straight through
+COUNTER_FLUSH_INTERVAL = float(os.environ.get('COUNTER_FLUSH_INTERVAL', 5))
+# Listings with pending deltas before an add forces a flush
+COUNTER_BUFFER_SIZE = int(os.environ.get('COUNTER_BUFFER_SIZE', 10000))
+COUNTER_FIELDS = ('views', 'favorites')
+
+
+class CounterBuffer:
+    """Per-listing counter deltas, flushed to the cars collection with $inc"""
+
+    def __init__(self, get_db, interval=COUNTER_FLUSH_INTERVAL, max_listings=COUNTER_BUFFER_SIZE):
+        self.get_db = get_db
+        self.interval = interval
+        self.max_listings = max_listings
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Serializes flushes so deltas put back after a failed write aren't applied twice
+        self._flush_lock = threading.Lock()
+        self._pid = None
+        self.added = 0
+        self.flushes = 0
+        self.written = 0
+        self.failures = 0
+        self.forced_flushes = 0
+        self.last_flush_seconds = None
+
+    def _start(self):
+        # Called under _lock. Deltas inherited through fork belong to the parent, which flushes them
+        self._pid = os.getpid()
+        self._pending = {}
+        if self.interval > 0:
+            threading.Thread(target=self._loop, name='counter-flush', daemon=True).start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def add(self, listing_id, field, amount=1):
+        """Count amount more of field ('views' or 'favorites') for a listing"""
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"field must be one of {', '.join(COUNTER_FIELDS)}")
+        listing_id = str(listing_id)
+        if self.interval <= 0:
+            return self.get_db().increment_car_counters(listing_id, {field: amount})
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start()
+            full = listing_id not in self._pending and len(self._pending) >= self.max_listings
+            self._pending.setdefault(listing_id, Counter())[field] += amount
+            self.added += amount
+            if full:
+                self.forced_flushes += 1
+        if full:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Write all pending deltas now; returns the number of cars updated"""
+        with self._flush_lock:
+            with self._lock:
+                if self._pid != os.getpid() or not self._pending:
+                    return 0
+                deltas, self._pending = self._pending, {}
+            started = time.perf_counter()
+            try:
+                written = self.get_db().bulk_increment_car_counters(deltas)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Counter flush of {len(deltas)} listings failed: {e}")
+                self._restore(deltas)
+                return 0
+            self.flushes += 1
+            self.written += written
+            self.last_flush_seconds = round(time.perf_counter() - started, 4)
+            return written
+
+    def _restore(self, deltas):
+        """Put failed deltas back for the next flush, as far as the buffer bound allows"""
+        with self._lock:
+            for listing_id, counts in deltas.items():
+                if listing_id in self._pending:
+                    self._pending[listing_id].update(counts)
+                elif len(self._pending) < self.max_listings:
+                    self._pending[listing_id] = counts
+                else:
+                    logger.warning(f"Dropping counter deltas for listing {listing_id}: buffer full")
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'pending_listings': pending,
+            'max_listings': self.max_listings,
+            'interval_seconds': self.interval,
+            'added': self.added,
+            'flushes': self.flushes,
+            'forced_flushes': self.forced_flushes,
+            'written': self.written,
+            'failures': self.failures,
+            'last_flush_seconds': self.last_flush_seconds
+        }
+
+
+def flush_at_exit(buffer):
+    """Flush buffer when the interpreter exits"""
+    def flush():
+        try:
+            buffer.flush()
+        except Exception as e:
+            logger.error(f"Counter flush at exit failed: {e}")
+
+    atexit.register(flush)
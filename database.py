@@ -1,9 +1,314 @@
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
-from bson import ObjectId
+from bson import ObjectId, json_util
+import base64
+import hashlib
 import os
+import re
+import threading
+from collections import Counter, deque
 from datetime import datetime
 
+from search_index import MAX_TEXT_RESULTS, TEXT_WEIGHTS, SearchIndex
+
+# MongoClient pool settings; each process (gunicorn worker) gets its own client and pool
+MONGODB_MAX_POOL_SIZE = int(os.environ.get('MONGODB_MAX_POOL_SIZE', 50))
+MONGODB_MIN_POOL_SIZE = int(os.environ.get('MONGODB_MIN_POOL_SIZE', 0))
+MONGODB_MAX_IDLE_TIME_MS = int(os.environ.get('MONGODB_MAX_IDLE_TIME_MS', 300000))
+# How long a request may wait for a free pooled connection before failing
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGODB_WAIT_QUEUE_TIMEOUT_MS', 5000))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGODB_CONNECT_TIMEOUT_MS', 5000))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGODB_SOCKET_TIMEOUT_MS', 30000))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 5000))
+# Checkout waits kept for the percentiles in /metrics
+POOL_WAIT_SAMPLES = 1000
+
+
+def client_options():
+    """MongoClient keyword arguments for the pool and timeout settings"""
+    return {
+        'maxPoolSize': MONGODB_MAX_POOL_SIZE,
+        'minPoolSize': MONGODB_MIN_POOL_SIZE,
+        'maxIdleTimeMS': MONGODB_MAX_IDLE_TIME_MS,
+        'waitQueueTimeoutMS': MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        'connectTimeoutMS': MONGODB_CONNECT_TIMEOUT_MS,
+        'socketTimeoutMS': MONGODB_SOCKET_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': MONGODB_SERVER_SELECTION_TIMEOUT_MS
+    }
+
+
+class PoolMetrics:
+    """Connection pool counters fed by a pymongo ConnectionPoolListener"""
+
+    def __init__(self, samples=POOL_WAIT_SAMPLES):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.clears = 0
+        self.failures = Counter()
+        self.timed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._waits = deque(maxlen=samples)
+
+    def listener(self):
+        """A ConnectionPoolListener recording into these metrics, for MongoClient(event_listeners=...)"""
+        from pymongo.monitoring import ConnectionPoolListener
+
+        metrics = self
+
+        class Listener(ConnectionPoolListener):
+            def pool_created(self, event):
+                pass
+
+            def pool_ready(self, event):
+                pass
+
+            def pool_closed(self, event):
+                pass
+
+            def connection_ready(self, event):
+                pass
+
+            def connection_check_out_started(self, event):
+                pass
+
+            def pool_cleared(self, event):
+                with metrics._lock:
+                    metrics.clears += 1
+
+            def connection_created(self, event):
+                with metrics._lock:
+                    metrics.open += 1
+
+            def connection_closed(self, event):
+                with metrics._lock:
+                    metrics.open -= 1
+
+            def connection_checked_out(self, event):
+                # Checkout events carry duration only on pymongo >= 4.7
+                metrics.checked_out(getattr(event, 'duration', None))
+
+            def connection_check_out_failed(self, event):
+                metrics.check_out_failed(str(event.reason), getattr(event, 'duration', None))
+
+            def connection_checked_in(self, event):
+                with metrics._lock:
+                    metrics.in_use -= 1
+
+        return Listener()
+
+    def checked_out(self, wait):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            if wait is not None:
+                self.timed += 1
+                self.wait_total += wait
+                self._record_wait(wait)
+
+    def check_out_failed(self, reason, wait):
+        with self._lock:
+            self.failures[reason] += 1
+            if wait is not None:
+                self._record_wait(wait)
+
+    def _record_wait(self, wait):
+        # Called under _lock
+        self.wait_max = max(self.wait_max, wait)
+        self._waits.append(wait)
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                'open_connections': self.open,
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'checkouts': self.checkouts,
+                'checkout_failures': dict(self.failures),
+                'pool_clears': self.clears,
+                # None when the driver doesn't report checkout durations
+                'wait_ms': None
+            }
+            if waits:
+                stats['wait_ms'] = {
+                    'mean': round(self.wait_total / self.timed * 1000, 3) if self.timed else None,
+                    'max': round(self.wait_max * 1000, 3)
+                }
+        if waits:
+            for name, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+                stats['wait_ms'][name] = round(waits[min(int(q * len(waits)), len(waits) - 1)] * 1000, 3)
+        return stats
+
+
+# Indexes per collection as (keys, options), created by Database.ensure_indexes on connect.
+# Compound keys put equality fields first and the range/sort field (price, dates) last.
+INDEXES = {
+    'users': [
+        ([('username', 1)], {'unique': True}),
+        ([('email', 1)], {'unique': True}),
+        ([('username_lc', 1)], {}),
+        ([('email_lc', 1)], {}),
+        ([('is_active', 1)], {}),
+        ([('created_at', -1)], {})
+    ],
+    'cars': [
+        ([('status', 1), ('price', 1)], {}),
+        ([('status', 1), ('created_at', -1), ('_id', -1)], {}),
+        ([('price', 1), ('_id', 1)], {}),
+        ([('fuel', 1), ('price', 1)], {}),
+        ([('year', 1), ('price', 1)], {}),
+        ([('brand_lc', 1), ('price', 1)], {}),
+        ([('location_lc', 1)], {}),
+        ([('model_lc', 1)], {}),
+        ([('created_at', -1), ('_id', -1)], {}),
+        ([('year', -1), ('_id', -1)], {}),
+        ([('km_driven', 1), ('_id', 1)], {}),
+        # Full-text search; 'none' skips stemming and stop words, which mangle trim codes like "vxi"
+        ([(field, 'text') for field in TEXT_WEIGHTS],
+         {'name': 'car_text', 'weights': TEXT_WEIGHTS, 'default_language': 'none'})
+    ],
+    'deleted_users': [
+        ([('deleted_at', -1)], {}),
+        ([('deleted_user_id', 1)], {}),
+        ([('username_lc', 1)], {}),
+        ([('email_lc', 1)], {})
+    ]
+}
+
+# Filter/sort shapes the app issues, as (collection, description, filter, sort); values are placeholders.
+# `check_database.py indexes` explains each one and fails on a collection scan.
+QUERY_SHAPES = [
+    ('users', 'find_user_by_username', {'username': 'demo'}, None),
+    ('users', 'find_user_by_email', {'email': 'demo@example.com'}, None),
+    ('users', 'admin stats: active users', {'is_active': True}, None),
+    ('users', 'admin stats: recent registrations', {'created_at': {'$gte': datetime(2024, 1, 1)}}, None),
+    ('users', 'admin search-user', {'$or': [{'username_lc': {'$regex': '^demo'}},
+                                            {'email_lc': {'$regex': '^demo'}}]}, None),
+    ('cars', 'get_collection_stats / get_all_cars by status', {'status': 'available'}, None),
+    ('cars', 'search_cars: price range', {'price': {'$gte': 100000, '$lte': 500000}}, None),
+    ('cars', 'search_cars: status + price', {'status': 'available', 'price': {'$lte': 500000}}, None),
+    ('cars', 'search_cars: fuel + price', {'fuel': 'Petrol', 'price': {'$gte': 100000, '$lte': 500000}}, None),
+    ('cars', 'search_cars: year', {'year': 2018}, None),
+    ('cars', 'search_cars: brand prefix', {'brand_lc': {'$regex': '^maruti'}}, None),
+    ('cars', 'search_cars: brand prefix + price', {'brand_lc': {'$regex': '^maruti'},
+                                                  'price': {'$lte': 500000}}, None),
+    ('cars', 'search_cars / get_cars_by_location: location prefix', {'location_lc': {'$regex': '^bang'}}, None),
+    ('cars', 'search_cars: model prefix', {'model_lc': {'$regex': '^swift'}}, None),
+    ('cars', 'page_cars: full-text search', {'$text': {'$search': 'swift vxi diesel bangalore'}}, None),
+    ('cars', 'page_cars: full-text search + price', {'$text': {'$search': 'swift'}, 'price': {'$lte': 500000}}, None),
+    ('cars', 'page_cars: newest', {}, [('created_at', -1), ('_id', -1)]),
+    ('cars', 'page_cars: newest, next page', {'$or': [{'created_at': {'$lt': datetime(2024, 1, 1)}},
+                                                      {'created_at': datetime(2024, 1, 1), '_id': {'$lt': ObjectId()}}]},
+     [('created_at', -1), ('_id', -1)]),
+    ('cars', 'page_cars: available, newest', {'status': 'available'}, [('created_at', -1), ('_id', -1)]),
+    ('cars', 'page_cars: cheapest', {}, [('price', 1), ('_id', 1)]),
+    ('cars', 'page_cars: newest model year', {}, [('year', -1), ('_id', -1)]),
+    ('cars', 'page_cars: lowest km', {}, [('km_driven', 1), ('_id', 1)]),
+    ('deleted_users', 'admin deleted users', {}, [('deleted_at', -1)]),
+    ('deleted_users', 'admin restore user', {'deleted_user_id': None}, None),
+    ('deleted_users', 'admin search-deleted-user', {'$or': [{'username_lc': {'$regex': '^demo'}},
+                                                            {'email_lc': {'$regex': '^demo'}}]}, None)
+]
+
+# Lowercased copies (<field>_lc) kept beside these fields so case-insensitive searches can use an
+# index: an anchored, case-sensitive regex on a lowercase field is an index range scan, while
+# $options: 'i' or an unanchored pattern has to test every key
+SEARCH_FIELDS = {
+    'cars': ('brand', 'model', 'location'),
+    'users': ('username', 'email'),
+    'deleted_users': ('username', 'email')
+}
+
+
+def search_key(value):
+    """The normalized form stored in <field>_lc and matched by searches"""
+    return str(value).strip().lower()
+
+
+def add_search_fields(document, collection_name):
+    """Set the <field>_lc shadow fields for whichever search fields the document (or $set) carries"""
+    for field in SEARCH_FIELDS[collection_name]:
+        if document.get(field) is not None:
+            document[f'{field}_lc'] = search_key(document[field])
+    return document
+
+
+def prefix_match(value):
+    """Condition on a <field>_lc field: starts with value, ignoring case"""
+    return {'$regex': '^' + re.escape(search_key(value))}
+
+
+# Listing sort orders for page_cars: name -> (field, direction); _id in the same direction breaks ties
+CAR_SORTS = {
+    'date': ('created_at', -1),
+    'price_low': ('price', 1),
+    'price_high': ('price', -1),
+    'year': ('year', -1),
+    'km': ('km_driven', 1)
+}
+# Named field sets for reading cars; marketplace listings carry ~40 fields, most of them nested.
+# summary: a search-result row (one thumbnail, plus what monthly running cost needs)
+# card: a listing card or list API entry; detail (None): the whole document
+_SUMMARY_FIELDS = ['brand', 'model', 'year', 'price', 'km_driven', 'fuel', 'transmission', 'location',
+                   'seller_type', 'status', 'created_at', 'posted_date', 'last_updated', 'views',
+                   'favorites', 'mileage', 'car_details.mileage', 'image']
+_CARD_FIELDS = _SUMMARY_FIELDS + ['images', 'condition', 'features', 'description', 'owner', 'engine',
+                                  'power', 'color', 'seats', 'negotiable', 'availability', 'registration_state']
+CAR_PROJECTIONS = {
+    'summary': {**{field: 1 for field in _SUMMARY_FIELDS}, 'images': {'$slice': 1}},
+    'card': {field: 1 for field in _CARD_FIELDS},
+    'detail': None
+}
+
+
+def car_projection(projection):
+    """A find() projection from a CAR_PROJECTIONS name, a projection dict, or None (every field)"""
+    if isinstance(projection, str):
+        if projection not in CAR_PROJECTIONS:
+            raise ValueError(f"projection must be one of {', '.join(CAR_PROJECTIONS)}")
+        return CAR_PROJECTIONS[projection]
+    return projection
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _query_fingerprint(query):
+    return hashlib.sha1(json_util.dumps(query, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def encode_cursor(sort, query, value, last_id):
+    """Opaque continuation token: the last row's sort key and _id, bound to its query and sort"""
+    payload = json_util.dumps({'s': sort, 'q': _query_fingerprint(query), 'v': value, 'id': last_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort, query):
+    """(value, last_id) from encode_cursor; ValueError if the token is malformed or from another query"""
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        value, last_id = payload['v'], payload['id']
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if payload.get('s') != sort or payload.get('q') != _query_fingerprint(query):
+        raise ValueError("Cursor does not belong to this query; start again without a cursor")
+    return value, last_id
+
+
+def keyset_condition(field, direction, value, last_id):
+    """Filter for the rows after (value, last_id) in (field, _id) order"""
+    after = '$gt' if direction > 0 else '$lt'
+    same_key = {field: value, '_id': {after: last_id}}
+    if value is None:
+        # Missing keys sort lowest, and $gt/$lt never match across types
+        return {'$or': [{field: {'$ne': None}}, same_key]} if direction > 0 else same_key
+    return {'$or': [{field: {after: value}}, same_key]}
+
+
 class Database:
     def __init__(self):
        self.connection_string = os.environ.get('MONGODB_URI')
@@ -14,27 +319,64 @@ class Database:
        self.db = None
        self.users_collection = None
        self.cars_collection = None
+       # None until the first text search tells us whether the server runs $text
+       self.text_search_available = None
+       self.search_index = SearchIndex(self._text_documents)
+       self.pool_metrics = PoolMetrics()
+       # The client's pool and monitor threads belong to this process; get_database replaces it after fork
+       self.pid = os.getpid()
        self.connect()
     
     def connect(self):
         """Connect to MongoDB database"""
+        # pymongo is imported on first connect; it is a large share of app import time
+        from pymongo import MongoClient
+        from pymongo.errors import ConnectionFailure
         try:
-            self.client = MongoClient(self.connection_string)
+            self.client = MongoClient(self.connection_string, event_listeners=[self.pool_metrics.listener()],
+                                      **client_options())
             # Test connection
             self.client.admin.command('ping')
             self.db = self.client[self.database_name]
             self.users_collection = self.db['users']
             self.cars_collection = self.db['cars']
             print("Connected to MongoDB successfully")
+            if os.environ.get('MONGODB_ENSURE_INDEXES', '1') != '0':
+                self.ensure_indexes()
         except ConnectionFailure:
             print("Failed to connect to MongoDB")
             raise
     
+    def ensure_indexes(self):
+        """Create any INDEXES that don't exist yet; existing ones are left alone"""
+        created = []
+        for collection_name, indexes in INDEXES.items():
+            collection = self.db[collection_name]
+            try:
+                information = collection.index_information()
+            except Exception as e:
+                print(f"Error reading indexes of {collection_name}: {e}")
+                continue
+            # Text indexes report their keys as _fts/_ftsx, so those are matched by name
+            existing = {tuple(info['key']) for info in information.values()} | set(information)
+            for keys, options in indexes:
+                if tuple(keys) in existing or options.get('name') in existing:
+                    continue
+                try:
+                    created.append(collection.create_index(keys, **options))
+                except Exception as e:
+                    # Duplicate usernames/emails block a unique index; the app still runs without it
+                    print(f"Error creating index {keys} on {collection_name}: {e}")
+        if created:
+            print(f"Created indexes: {', '.join(created)}")
+        return created
+    
     # USER MANAGEMENT METHODS
     def create_user(self, user_data):
         """Insert a new user into the database"""
         try:
             user_data['created_at'] = datetime.now()
+            add_search_fields(user_data, 'users')
             result = self.users_collection.insert_one(user_data)
             return result.inserted_id
         except Exception as e:
@@ -69,6 +411,7 @@ class Database:
         """Update user information"""
         try:
             update_data['updated_at'] = datetime.now()
+            add_search_fields(update_data, 'users')
             result = self.users_collection.update_one(
                 {'_id': ObjectId(user_id)},
                 {'$set': update_data}
@@ -93,20 +436,23 @@ class Database:
         try:
             car_data['created_at'] = datetime.now()
             car_data['updated_at'] = datetime.now()
+            add_search_fields(car_data, 'cars')
             result = self.cars_collection.insert_one(car_data)
+            self.search_index.invalidate()
             return result.inserted_id
         except Exception as e:
             print(f"Error creating car: {e}")
             return None
     
-    def get_all_cars(self, status=None, limit=None):
+    def get_all_cars(self, status=None, limit=None, projection=None):
         """Get all cars or filter by status"""
+        projection = car_projection(projection)
         try:
             query = {}
             if status:
                 query['status'] = status
             
-            cursor = self.cars_collection.find(query)
+            cursor = self.cars_collection.find(query, projection)
             if limit:
                 cursor = cursor.limit(limit)
             
@@ -119,10 +465,11 @@ class Database:
             print(f"Error getting cars: {e}")
             return []
     
-    def find_car_by_id(self, car_id):
+    def find_car_by_id(self, car_id, projection=None):
         """Find a car by ID"""
+        projection = car_projection(projection)
         try:
-            car = self.cars_collection.find_one({'_id': ObjectId(car_id)})
+            car = self.cars_collection.find_one({'_id': ObjectId(car_id)}, projection)
             if car:
                 car['_id'] = str(car['_id'])
             return car
@@ -134,63 +481,136 @@ class Database:
         """Update car information"""
         try:
             update_data['updated_at'] = datetime.now()
+            add_search_fields(update_data, 'cars')
             result = self.cars_collection.update_one(
                 {'_id': ObjectId(car_id)},
                 {'$set': update_data}
             )
+            self.search_index.invalidate()
             return result.modified_count > 0
         except Exception as e:
             print(f"Error updating car: {e}")
             return False
     
+    def increment_car_counters(self, car_id, counts):
+        """Atomically add counts ({'views': 1}) to a car's counters in one round trip"""
+        # last_updated is the listing activity time shown by /api/listings
+        now = datetime.now()
+        try:
+            result = self.cars_collection.update_one(
+                {'_id': ObjectId(car_id)},
+                {'$inc': dict(counts), '$set': {'last_updated': now, 'updated_at': now}}
+            )
+            return result.modified_count > 0
+        except Exception as e:
+            print(f"Error incrementing car counters: {e}")
+            return False
+    
+    def bulk_increment_car_counters(self, deltas):
+        """Apply {car_id: {'views': n, ...}} as $inc updates in one unordered bulk_write; returns cars updated"""
+        from pymongo import UpdateOne
+
+        now = datetime.now()
+        operations = [UpdateOne({'_id': ObjectId(car_id)},
+                                {'$inc': dict(counts), '$set': {'last_updated': now, 'updated_at': now}})
+                      for car_id, counts in deltas.items() if counts]
+        if not operations:
+            return 0
+        return self.cars_collection.bulk_write(operations, ordered=False).modified_count
+    
     def delete_car(self, car_id):
         """Delete a car"""
         try:
             result = self.cars_collection.delete_one({'_id': ObjectId(car_id)})
+            self.search_index.invalidate()
             return result.deleted_count > 0
         except Exception as e:
             print(f"Error deleting car: {e}")
             return False
     
-    def search_cars(self, filters):
+    @staticmethod
+    def car_query(filters):
+        """MongoDB filter for the search filters used by search_cars and page_cars"""
+        query = {}
+        
+        # Brand filter
+        if filters.get('brand'):
+            query['brand_lc'] = prefix_match(filters['brand'])
+        
+        # Price range filter
+        if filters.get('min_price') or filters.get('max_price'):
+            price_query = {}
+            if filters.get('min_price'):
+                price_query['$gte'] = filters['min_price']
+            if filters.get('max_price'):
+                price_query['$lte'] = filters['max_price']
+            query['price'] = price_query
+        
+        # Fuel type filter
+        if filters.get('fuel'):
+            query['fuel'] = filters['fuel']
+        
+        # Year filter
+        if filters.get('year'):
+            query['year'] = filters['year']
+        elif filters.get('year_from') or filters.get('year_to'):
+            year_query = {}
+            if filters.get('year_from'):
+                year_query['$gte'] = filters['year_from']
+            if filters.get('year_to'):
+                year_query['$lte'] = filters['year_to']
+            query['year'] = year_query
+        
+        # Transmission filter
+        if filters.get('transmission'):
+            query['transmission'] = filters['transmission']
+        
+        # Location filter
+        if filters.get('location'):
+            query['location_lc'] = prefix_match(filters['location'])
+        
+        # Status filter
+        if filters.get('status'):
+            query['status'] = filters['status']
+        
+        # Free text over make, model, variant, fuel, location, features and description
+        if filters.get('search'):
+            query['$text'] = {'$search': str(filters['search'])}
+        return query
+    
+    def _text_documents(self):
+        """The searchable fields of every car, for the in-process search index"""
+        return self.cars_collection.find({}, {field: 1 for field in TEXT_WEIGHTS})
+    
+    def _local_text_query(self, criteria):
+        """criteria with its \$text clause answered by the in-process index as an _id \$in list"""
+        ranked = self.search_index.search(criteria['$text']['$search'])
+        query = {key: value for key, value in criteria.items() if key != '$text'}
+        query['_id'] = {'$in': [car_id for car_id, _ in ranked]}
+        return query, ranked
+    
+    def _run_text_aware(self, criteria, run):
+        """run(criteria), answering \$text from the in-process index if the server can't"""
+        from pymongo.errors import OperationFailure
+        
+        if '$text' not in criteria:
+            return run(criteria)
+        if self.text_search_available is not False:
+            try:
+                result = run(criteria)
+                self.text_search_available = True
+                return result
+            except (OperationFailure, NotImplementedError) as e:
+                print(f"Text search unavailable on the server, using the in-process index: {e}")
+                self.text_search_available = False
+        return run(self._local_text_query(criteria)[0])
+    
+    def search_cars(self, filters, projection=None):
         """Search cars with multiple filters"""
+        projection = car_projection(projection)
         try:
-            query = {}
-            
-            # Brand filter
-            if filters.get('brand'):
-                query['brand'] = {'$regex': filters['brand'], '$options': 'i'}
-            
-            # Price range filter
-            if filters.get('min_price') or filters.get('max_price'):
-                price_query = {}
-                if filters.get('min_price'):
-                    price_query['$gte'] = filters['min_price']
-                if filters.get('max_price'):
-                    price_query['$lte'] = filters['max_price']
-                query['price'] = price_query
-            
-            # Fuel type filter
-            if filters.get('fuel'):
-                query['fuel'] = filters['fuel']
-            
-            # Year filter
-            if filters.get('year'):
-                query['year'] = filters['year']
-            
-            # Location filter
-            if filters.get('location'):
-                query['location'] = {'$regex': filters['location'], '$options': 'i'}
-            
-            # Status filter
-            if filters.get('status'):
-                query['status'] = filters['status']
-            
-            # Text search in model
-            if filters.get('search'):
-                query['model'] = {'$regex': filters['search'], '$options': 'i'}
-            
-            cars = list(self.cars_collection.find(query))
+            cars = self._run_text_aware(self.car_query(filters),
+                                        lambda query: list(self.cars_collection.find(query, projection)))
             # Convert ObjectId to string for JSON serialization
             for car in cars:
                 car['_id'] = str(car['_id'])
@@ -199,10 +619,152 @@ class Database:
             print(f"Error searching cars: {e}")
             return []
     
-    def get_cars_by_location(self, location):
+    def page_cars(self, filters=None, sort='date', page_size=None, cursor=None, projection=None):
+        """One page of cars matching the search filters, and the cursor for the next page.
+
+        Keyset pagination on (sort field, _id): each page is an index range
+        scan that starts where the previous one ended, so deep pages cost the
+        same as the first. The cursor is None on the last page.
+        
+        sort='relevance' ranks a filters['search'] text search by score
+        instead (offset pages, at most MAX_TEXT_RESULTS results). Raises
+        ValueError for an unknown sort, projection or a bad cursor.
+        """
+        if sort == 'relevance':
+            if (filters or {}).get('search'):
+                return self._page_by_relevance(filters, page_size, cursor, car_projection(projection))
+            sort = 'date'
+        if sort not in CAR_SORTS:
+            raise ValueError(f"sort must be one of relevance, {', '.join(CAR_SORTS)}")
+        field, direction = CAR_SORTS[sort]
+        projection = car_projection(projection)
+        if projection and any(value == 1 for value in projection.values()):
+            # The next cursor is built from the sort key, so it has to come back
+            projection = {**projection, field: 1}
+        page_size = min(max(int(page_size or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+        query = self.car_query(filters or {})
+        criteria = query
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort, query)
+            # Under \$and so a \$text clause stays at the top level, where MongoDB requires it
+            criteria = {**query, '$and': [keyset_condition(field, direction, value, last_id)]}
+        try:
+            cars = self._run_text_aware(criteria, lambda query: list(
+                self.cars_collection.find(query, projection)
+                .sort([(field, direction), ('_id', direction)])
+                .limit(page_size + 1)))
+        except Exception as e:
+            print(f"Error paging cars: {e}")
+            return [], None
+        next_cursor = None
+        if len(cars) > page_size:
+            cars = cars[:page_size]
+            next_cursor = encode_cursor(sort, query, cars[-1].get(field), cars[-1]['_id'])
+        for car in cars:
+            car['_id'] = str(car['_id'])
+        return cars, next_cursor
+    
+    def _page_by_relevance(self, filters, page_size, cursor, projection):
+        """A page of a text search, best match first; each car carries its relevance score"""
+        from pymongo.errors import OperationFailure
+        
+        page_size = min(max(int(page_size or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+        query = self.car_query(filters)
+        offset = 0
+        if cursor:
+            offset, _ = decode_cursor(cursor, self._relevance_cursor_sort(), query)
+            if not isinstance(offset, int) or offset < 0:
+                raise ValueError("Invalid cursor")
+        if self.text_search_available is not False:
+            limit = min(page_size + 1, MAX_TEXT_RESULTS - offset)
+            if limit <= 0:
+                return [], None
+            score = {'score': {'$meta': 'textScore'}}
+            try:
+                cars = list(self.cars_collection.find(query, {**(projection or {}), **score})
+                            .sort([('score', {'$meta': 'textScore'}), ('_id', 1)])
+                            .skip(offset).limit(limit))
+                self.text_search_available = True
+                next_cursor = None
+                if len(cars) > page_size:
+                    cars = cars[:page_size]
+                    next_cursor = encode_cursor('relevance', query, offset + page_size, None)
+                for car in cars:
+                    car['_id'] = str(car['_id'])
+                return cars, next_cursor
+            except (OperationFailure, NotImplementedError) as e:
+                print(f"Text search unavailable on the server, using the in-process index: {e}")
+                self.text_search_available = False
+            except Exception as e:
+                print(f"Error searching cars: {e}")
+                return [], None
+        return self._local_relevance_page(query, offset, page_size, projection)
+    
+    def _relevance_cursor_sort(self):
+        # Server pages are offsets into the filtered results, local ones positions in the ranked list
+        return 'relevance-local' if self.text_search_available is False else 'relevance'
+    
+    def _local_relevance_page(self, query, position, page_size, projection):
+        """A relevance page from the in-process index, fetching only a slice of the ranked ids at a time.
+
+        The cursor holds the position in the ranked list after the page's
+        last car, so a page never re-reads the ranks before it. With other
+        filters some ranked cars are rejected, so slices are fetched until
+        page_size + 1 cars pass (the slice doubling each round).
+        """
+        ranked = self.search_index.search(query['$text']['$search'])
+        others = {key: value for key, value in query.items() if key != '$text'}
+        matches = []
+        chunk = page_size + 1
+        while position < len(ranked) and len(matches) <= page_size:
+            piece = ranked[position:position + chunk]
+            found = {car['_id']: car for car in
+                     self.cars_collection.find({**others, '_id': {'$in': [car_id for car_id, _ in piece]}},
+                                               projection)}
+            for car_id, score in piece:
+                position += 1
+                if car_id in found:
+                    matches.append((position, {**found[car_id], 'score': round(score, 3)}))
+            chunk *= 2
+        next_cursor = None
+        if len(matches) > page_size:
+            next_cursor = encode_cursor('relevance-local', query, matches[page_size - 1][0], None)
+            matches = matches[:page_size]
+        cars = [car for _, car in matches]
+        for car in cars:
+            car['_id'] = str(car['_id'])
+        return cars, next_cursor
+    
+    def get_featured_cars(self, limit=6, projection=None):
+        """Most viewed and favorited cars (favorites count double), ranked in the database"""
+        projection = car_projection(projection)
+        try:
+            pipeline = [
+                {'$addFields': {'_featured_score': {'$add': [{'$ifNull': ['$views', 0]},
+                                                             {'$multiply': [{'$ifNull': ['$favorites', 0]}, 2]}]}}},
+                {'$sort': {'_featured_score': -1, '_id': 1}},
+                {'$limit': limit},
+                {'$project': {'_featured_score': 0}}
+            ]
+            if projection:
+                # Aggregation spells find()'s {'$slice': n} as an expression over the field
+                pipeline[-1] = {'$project': {
+                    field: {'$slice': [f'${field}', value['$slice']]} if isinstance(value, dict) else value
+                    for field, value in projection.items()
+                }}
+            cars = list(self.cars_collection.aggregate(pipeline))
+            for car in cars:
+                car['_id'] = str(car['_id'])
+            return cars
+        except Exception as e:
+            print(f"Error getting featured cars: {e}")
+            return []
+    
+    def get_cars_by_location(self, location, projection=None):
         """Get cars by location"""
+        projection = car_projection(projection)
         try:
-            cars = list(self.cars_collection.find({'location': {'$regex': location, '$options': 'i'}}))
+            cars = list(self.cars_collection.find({'location_lc': prefix_match(location)}, projection))
             for car in cars:
                 car['_id'] = str(car['_id'])
             return cars
@@ -210,12 +772,13 @@ class Database:
             print(f"Error getting cars by location: {e}")
             return []
     
-    def get_cars_by_price_range(self, min_price, max_price):
+    def get_cars_by_price_range(self, min_price, max_price, projection=None):
         """Get cars within a price range"""
+        projection = car_projection(projection)
         try:
             cars = list(self.cars_collection.find({
                 'price': {'$gte': min_price, '$lte': max_price}
-            }))
+            }, projection))
             for car in cars:
                 car['_id'] = str(car['_id'])
             return cars
@@ -229,8 +792,10 @@ class Database:
             for car in cars_data:
                 car['created_at'] = datetime.now()
                 car['updated_at'] = datetime.now()
+                add_search_fields(car, 'cars')
             
             result = self.cars_collection.insert_many(cars_data)
+            self.search_index.invalidate()
             return result.inserted_ids
         except Exception as e:
             print(f"Error bulk inserting cars: {e}")
@@ -242,7 +807,44 @@ class Database:
             self.client.close()
             print("MongoDB connection closed")
     
+    def backfill_search_fields(self, batch_size=1000):
+        """Set <field>_lc on documents written before the shadow fields existed (or out of sync).
+
+        Walks each collection in _id order, a batch at a time, and writes
+        only documents whose shadow fields differ, with one unordered
+        bulk_write per batch. Safe to re-run. Returns updated counts.
+        """
+        from pymongo import UpdateOne
+
+        updated = {}
+        for collection_name, fields in SEARCH_FIELDS.items():
+            collection = self.db[collection_name]
+            projection = {name: 1 for field in fields for name in (field, f'{field}_lc')}
+            updated[collection_name] = 0
+            last_id = None
+            while True:
+                query = {'_id': {'$gt': last_id}} if last_id is not None else {}
+                batch = list(collection.find(query, projection).sort('_id', 1).limit(batch_size))
+                if not batch:
+                    break
+                last_id = batch[-1]['_id']
+                operations = []
+                for document in batch:
+                    shadow = add_search_fields({field: document.get(field) for field in fields}, collection_name)
+                    changes = {name: value for name, value in shadow.items()
+                               if name.endswith('_lc') and document.get(name) != value}
+                    if changes:
+                        operations.append(UpdateOne({'_id': document['_id']}, {'$set': changes}))
+                if operations:
+                    updated[collection_name] += collection.bulk_write(operations, ordered=False).modified_count
+                print(f"   {collection_name}: scanned through {last_id}, {updated[collection_name]} updated")
+        return updated
+    
     # UTILITY METHODS
+    def pool_stats(self):
+        """Pool settings and checkout/in-use metrics of this process's client"""
+        return {'pid': self.pid, 'settings': client_options(), **self.pool_metrics.stats()}
+
     def get_collection_stats(self):
         """Get statistics about the collections"""
         try:
@@ -262,3 +864,39 @@ class Database:
         except Exception as e:
             print(f"Error getting collection stats: {e}")
             return {}
+
+
+_database = None
+_database_lock = threading.Lock()
+
+
+def get_database():
+    """Process-wide Database, created and connected on first use in each process"""
+    global _database
+    database = _database
+    if database is None or database.pid != os.getpid():
+        with _database_lock:
+            if _database is None or _database.pid != os.getpid():
+                _database = Database()
+            database = _database
+    return database
+
+
+def database_pool_stats():
+    """pool_stats() of this process's Database, or None if it hasn't connected yet"""
+    database = _database
+    if database is None or database.pid != os.getpid():
+        return None
+    return database.pool_stats()
+
+
+def _after_fork_in_child():
+    # A MongoClient isn't fork-safe: the child drops the inherited one (without closing it, which
+    # would end the parent's sessions) and connects its own on first use
+    global _database, _database_lock
+    _database = None
+    _database_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
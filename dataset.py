@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Cleaned training dataset, cached on disk in a columnar binary layout.
+
+Building the dataset runs the training notebook's pipeline (unit parsing,
+median/mode fills, IQR outlier removal on selling_price, brand and derived
+features) once per distinct Car_details.csv. The result is written as one
+.npy file per column plus a schema.json header:
+
+    .cache/dataset/<csv sha256[:16]>-<torque_units>/
+        schema.json
+        selling_price.npy
+        brand.npy
+        ...
+
+Later runs memory-map the columns instead of re-parsing the CSV.
+
+Usage:
+  python dataset.py                    # build (or reuse) the cache for Car_details.csv
+  python dataset.py data.csv --rebuild
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from prediction import INPUT_FIELDS, add_engineered_features
+from preprocessing import TORQUE_UNITS, prepare_cars, training_fill_values
+
+# Bump when the cleaning pipeline changes so stale caches are rebuilt
+DATASET_VERSION = 1
+
+DATASET_CACHE_DIR = os.environ.get('DATASET_CACHE_DIR', os.path.join('.cache', 'dataset'))
+
+SCHEMA_FILE = 'schema.json'
+TARGET_COLUMN = 'selling_price'
+ENGINEERED_COLUMNS = ['car_age', 'power_to_weight', 'mileage_efficiency']
+DATASET_COLUMNS = INPUT_FIELDS + ENGINEERED_COLUMNS + [TARGET_COLUMN]
+
+
+def csv_sha256(path, chunk_size=1 << 20):
+    """Hex SHA-256 of the raw CSV bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iqr_bounds(values, k=1.5):
+    """Tukey fences used by the notebook to drop price outliers"""
+    q1, q3 = values.quantile(0.25), values.quantile(0.75)
+    spread = q3 - q1
+    return q1 - k * spread, q3 + k * spread
+
+
+def clean_dataset(raw, torque_units='raw'):
+    """Notebook cleaning pipeline: returns (frame of DATASET_COLUMNS, fill_values, price_bounds)"""
+    # Fill values come from the full file, before outliers are dropped, as in the notebook
+    fill_values = training_fill_values(raw, torque_units)
+    frame = prepare_cars(raw, fill_values, torque_units).copy()
+    frame[TARGET_COLUMN] = raw[TARGET_COLUMN]
+    lower, upper = iqr_bounds(frame[TARGET_COLUMN])
+    frame = frame[(frame[TARGET_COLUMN] >= lower) & (frame[TARGET_COLUMN] <= upper)]
+    frame = add_engineered_features(frame.copy())
+    for col in ['brand', 'fuel', 'seller_type', 'transmission', 'owner']:
+        frame[col] = frame[col].astype(str)
+    return frame[DATASET_COLUMNS].reset_index(drop=True), fill_values, [float(lower), float(upper)]
+
+
+def _column_array(series):
+    """Fixed-width NumPy array for a column (unicode for labels) so it can be memory-mapped"""
+    if series.dtype == object:
+        return series.to_numpy(dtype=str)
+    return series.to_numpy()
+
+
+class Dataset:
+    """Cleaned training frame plus the schema it was built with"""
+
+    def __init__(self, frame, schema, path=None):
+        self.frame = frame
+        self.schema = schema
+        self.path = path
+
+    @property
+    def fill_values(self):
+        return self.schema['fill_values']
+
+    @property
+    def csv_sha256(self):
+        return self.schema['csv_sha256']
+
+    def __len__(self):
+        return len(self.frame)
+
+
+def cache_path(csv_hash, torque_units='raw', cache_dir=None):
+    return os.path.join(cache_dir or DATASET_CACHE_DIR, f"{csv_hash[:16]}-{torque_units}")
+
+
+def _read_cache(path, csv_hash, mmap=True):
+    try:
+        with open(os.path.join(path, SCHEMA_FILE)) as f:
+            schema = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if schema.get('version') != DATASET_VERSION or schema.get('csv_sha256') != csv_hash:
+        return None
+    columns = {
+        col: np.load(os.path.join(path, f"{col}.npy"), mmap_mode='r' if mmap else None)
+        for col in schema['columns']
+    }
+    return Dataset(pd.DataFrame(columns, copy=False), schema, path)
+
+
+def _write_cache(path, frame, schema):
+    """Write the columns and schema to a staging dir, then rename into place"""
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.build-', dir=parent)
+    try:
+        for col in frame.columns:
+            np.save(os.path.join(staging, f"{col}.npy"), _column_array(frame[col]))
+        with open(os.path.join(staging, SCHEMA_FILE), 'w') as f:
+            json.dump(schema, f, indent=2)
+        shutil.rmtree(path, ignore_errors=True)
+        os.rename(staging, path)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def build_dataset(csv_path='Car_details.csv', torque_units='raw', cache_dir=None, csv_hash=None):
+    """Clean csv_path and write its columnar cache, returning the Dataset"""
+    csv_hash = csv_hash or csv_sha256(csv_path)
+    raw = pd.read_csv(csv_path)
+    frame, fill_values, price_bounds = clean_dataset(raw, torque_units)
+    schema = {
+        'version': DATASET_VERSION,
+        'csv_sha256': csv_hash,
+        'source': os.path.basename(csv_path),
+        'torque_units': torque_units,
+        'rows': len(frame),
+        'raw_rows': len(raw),
+        'columns': list(frame.columns),
+        'dtypes': {col: str(_column_array(frame[col]).dtype) for col in frame.columns},
+        'fill_values': fill_values,
+        'price_bounds': price_bounds
+    }
+    path = cache_path(csv_hash, torque_units, cache_dir)
+    _write_cache(path, frame, schema)
+    return Dataset(frame, schema, path)
+
+
+def load_dataset(csv_path='Car_details.csv', torque_units='raw', cache_dir=None, rebuild=False, mmap=True):
+    """Cleaned dataset for csv_path, memory-mapped from the cache when it is current"""
+    if torque_units not in TORQUE_UNITS:
+        raise ValueError(f"torque_units must be one of {TORQUE_UNITS}")
+    csv_hash = csv_sha256(csv_path)
+    if not rebuild:
+        dataset = _read_cache(cache_path(csv_hash, torque_units, cache_dir), csv_hash, mmap)
+        if dataset is not None:
+            return dataset
+    return build_dataset(csv_path, torque_units, cache_dir, csv_hash)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the cleaned training dataset cache")
+    parser.add_argument('csv', nargs='?', default='Car_details.csv')
+    parser.add_argument('--torque-units', choices=TORQUE_UNITS, default='raw')
+    parser.add_argument('--cache-dir', default=None, help=f"Cache directory (default {DATASET_CACHE_DIR})")
+    parser.add_argument('--rebuild', action='store_true', help="Ignore an existing cache")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    dataset = load_dataset(args.csv, args.torque_units, args.cache_dir, args.rebuild)
+    elapsed = time.perf_counter() - started
+    schema = dataset.schema
+    print(f"✅ {schema['rows']:,} rows ({schema['raw_rows'] - schema['rows']:,} outliers dropped) "
+          f"in {elapsed * 1000:.1f}ms")
+    print(f"   Cache: {dataset.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Gunicorn configuration for the car price app.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Settings can be overridden with the usual environment variables
+(PORT, WEB_CONCURRENCY, GUNICORN_THREADS, GUNICORN_TIMEOUT).
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+# Import wsgi (and load the models) once in the master before forking
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    """Freeze the preloaded heap so the cyclic GC doesn't dirty shared pages in workers"""
+    import app as app_module
+    from wsgi import process_memory
+
+    # The app imports pandas/sklearn lazily; pull them in here so workers share them
+    app_module.active_bundle.warm_up()
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Master {os.getpid()} ready: models loaded in "
+                    f"{app_module.model_load_seconds:.2f}s, memory {process_memory()}")
+
+
+def post_worker_init(worker):
+    """Report each worker's memory split so page sharing can be checked"""
+    import app as app_module
+    from wsgi import process_memory
+
+    worker.log.info(f"Worker {worker.pid} booted: model generation {app_module.model_generation} "
+                    f"(loaded in master in {app_module.model_load_seconds:.2f}s), "
+                    f"memory {process_memory()}")
+
+
+def worker_exit(server, worker):
+    """Write the worker's buffered view/favorite counts before it goes away"""
+    import app as app_module
+
+    written = app_module.counter_buffer.flush()
+    if written:
+        worker.log.info(f"Worker {worker.pid} flushed counters for {written} listings on exit")
@@ -0,0 +1,184 @@
+import numpy as np
+
+# Marker sklearn uses for "no child" in tree_.children_left/right
+TREE_LEAF = -1
+
+
+class SklearnEngine:
+    """Pass-through engine that calls the estimator's own predict"""
+    name = 'sklearn'
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+
+class CompiledTreeEngine:
+    """Gradient Boosting ensemble flattened into contiguous NumPy arrays.
+
+    All trees are concatenated into single feature/threshold/left/right/value
+    arrays with leaves pointing at themselves, so every sample walks every
+    tree in lockstep for max_depth vectorized steps. Leaf values are then
+    summed tree by tree in the same order and precision as sklearn's
+    predict_stages, which keeps the output bit-identical to model.predict.
+
+    The lockstep walk wins on the small inputs that dominate request
+    latency; above batch_threshold rows sklearn's compiled loop is faster,
+    so large batches are handed to model.predict (same results either way).
+    """
+    name = 'compiled'
+    # Rows evaluated together; keeps the (rows x trees) node matrix cache-sized
+    block_size = 256
+    batch_threshold = 64
+
+    def __init__(self, model):
+        from sklearn.ensemble import GradientBoostingRegressor
+
+        # RandomForest & co. also have estimators_, but as a list of trees averaged differently
+        estimators = getattr(model, 'estimators_', None)
+        if (not isinstance(model, GradientBoostingRegressor) or not isinstance(estimators, np.ndarray)
+                or estimators.ndim != 2 or estimators.shape[1] != 1):
+            raise ValueError("Only fitted single-output gradient boosting regressors can be compiled")
+
+        self._model = model
+        self._model_loader = None
+        self.n_features = int(model.n_features_in_)
+        self.learning_rate = float(model.learning_rate)
+        self.init_value = self._init_value(model.init_)
+
+        trees = [estimator.tree_ for estimator in estimators[:, 0]]
+        sizes = np.array([tree.node_count for tree in trees], dtype=np.intp)
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+        feature, threshold, left, right, value = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            own = np.arange(tree.node_count, dtype=np.intp) + offset
+            is_leaf = tree.children_left == TREE_LEAF
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+            left.append(np.where(is_leaf, own, tree.children_left + offset))
+            right.append(np.where(is_leaf, own, tree.children_right + offset))
+            value.append(tree.value[:, 0, 0])
+
+        self.roots = offsets.astype(np.intp)
+        self.feature = np.ascontiguousarray(np.concatenate(feature), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64)
+        self.left = np.ascontiguousarray(np.concatenate(left), dtype=np.intp)
+        self.right = np.ascontiguousarray(np.concatenate(right), dtype=np.intp)
+        self.value = np.ascontiguousarray(np.concatenate(value), dtype=np.float64)
+        self.max_depth = max(int(tree.max_depth) for tree in trees)
+        # Interleaved (left, right) pairs so one take() picks the next node
+        self.children = np.ascontiguousarray(np.stack([self.left, self.right], axis=1).ravel())
+
+    # Arrays and scalars that fully describe the compiled ensemble
+    ARRAYS = ('roots', 'feature', 'threshold', 'left', 'right', 'value')
+    SCALARS = ('n_features', 'learning_rate', 'init_value', 'max_depth')
+
+    def to_arrays(self):
+        """Everything needed to rebuild this engine without the sklearn model"""
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays.update({name: np.asarray(getattr(self, name)) for name in self.SCALARS})
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, model_loader):
+        """Engine rebuilt from to_arrays() output; the sklearn model is loaded on first use"""
+        engine = cls.__new__(cls)
+        engine._model = None
+        engine._model_loader = model_loader
+        for name in cls.ARRAYS:
+            setattr(engine, name, np.ascontiguousarray(arrays[name]))
+        engine.n_features = int(arrays['n_features'])
+        engine.learning_rate = float(arrays['learning_rate'])
+        engine.init_value = float(arrays['init_value'])
+        engine.max_depth = int(arrays['max_depth'])
+        engine.children = np.ascontiguousarray(np.stack([engine.left, engine.right], axis=1).ravel())
+        return engine
+
+    @property
+    def model(self):
+        """The sklearn estimator; only large batches and verification need it"""
+        if self._model is None and self._model_loader is not None:
+            self._model = self._model_loader()
+        return self._model
+
+    @staticmethod
+    def _init_value(init):
+        """Constant raw prediction the ensemble starts from"""
+        if isinstance(init, str) and init == 'zero':
+            return 0.0
+        constant = getattr(init, 'constant_', None)
+        if constant is None:
+            raise ValueError(f"Unsupported init estimator: {type(init).__name__}")
+        return float(np.ravel(constant)[0])
+
+    def leaves(self, X):
+        """Global leaf index reached in every tree, shape (n_samples, n_trees)"""
+        flat_X = X.ravel()
+        row_starts = (np.arange(X.shape[0], dtype=np.intp) * X.shape[1])[:, None]
+        nodes = np.repeat(self.roots[None, :], X.shape[0], axis=0)
+        for _ in range(self.max_depth):
+            values = flat_X.take(row_starts + self.feature.take(nodes))
+            go_right = values > self.threshold.take(nodes)
+            nodes = self.children.take(2 * nodes + go_right)
+        return nodes
+
+    def predict(self, X):
+        if len(X) > self.batch_threshold:
+            return self.model.predict(X)
+        # sklearn validates tree input as float32, thresholds stay float64
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features}")
+        # sklearn rejects these rather than routing them down the trees; so do we
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN, infinity or a value too large for dtype('float32').")
+        X = np.ascontiguousarray(X)
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], self.block_size):
+            block = X[start:start + self.block_size]
+            contributions = np.empty((block.shape[0], len(self.roots) + 1), dtype=np.float64)
+            contributions[:, 0] = self.init_value
+            contributions[:, 1:] = self.learning_rate * self.value.take(self.leaves(block))
+            # Sequential left-to-right sum, matching sklearn's per-stage accumulation
+            out[start:start + block.shape[0]] = np.add.accumulate(contributions, axis=1)[:, -1]
+        return out
+
+    def probe_inputs(self, n_rows=256, seed=0):
+        """Synthetic rows that hit split thresholds exactly and fall between them"""
+        rng = np.random.default_rng(seed)
+        X = np.zeros((n_rows, self.n_features), dtype=np.float32)
+        for column in range(self.n_features):
+            used = self.threshold[(self.feature == column) & (self.left != np.arange(len(self.left), dtype=np.intp))]
+            if used.size == 0:
+                continue
+            low, high = used.min() - 1.0, used.max() + 1.0
+            X[:, column] = rng.uniform(low, high, n_rows)
+            exact = rng.random(n_rows) < 0.25
+            X[exact, column] = rng.choice(used, exact.sum())
+        return X
+
+    def matches(self, model, X=None):
+        """True when predictions are bit-identical to model.predict on X"""
+        if X is None:
+            X = self.probe_inputs()
+        compiled = np.concatenate([self.predict(X[start:start + self.batch_threshold])
+                                   for start in range(0, len(X), self.batch_threshold)])
+        return np.array_equal(compiled, model.predict(X))
+
+
+ENGINES = {
+    'sklearn': SklearnEngine,
+    'compiled': CompiledTreeEngine
+}
+
+
+def build_engine(model, kind='compiled'):
+    """Create the inference engine named by kind for a loaded model"""
+    if kind not in ENGINES:
+        raise ValueError(f"Unknown prediction engine '{kind}', expected one of {sorted(ENGINES)}")
+    return ENGINES[kind](model)
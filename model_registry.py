@@ -0,0 +1,348 @@
+"""
+Versioned model artifact bundles.
+
+A registry is a directory with one sub-directory per model version:
+
+    models/
+        ACTIVE                  <- name of the version the app should serve
+        20241018-120000/
+            manifest.json
+            model.pkl
+            scaler.pkl
+            label_encoders.pkl
+            feature_columns.pkl
+
+When the registry is empty the original artifacts in the project root
+(best_car_price_model.pkl, ...) are served as the legacy version.
+
+The first time a bundle is loaded with the compiled engine, the flattened
+trees, encoder classes and feature columns are written to a serving
+snapshot (.npz, keyed by the artifact bytes). Later loads read only the
+snapshot and do not import sklearn, which takes over a second to import.
+The pickles are unpickled on first access to bundle.model / .scaler /
+.encoders, e.g. for batches large enough to hand to model.predict.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from inference import CompiledTreeEngine, build_engine
+from prediction import EncodingTables, predict_batch
+
+logger = logging.getLogger(__name__)
+
+MODEL_REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR', 'models')
+LEGACY_MODEL_VERSION = os.environ.get('LEGACY_MODEL_VERSION', '2.0')
+
+# Version names are single directory names under the registry: no separators, no leading dot
+VERSION_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$')
+
+MANIFEST_FILE = 'manifest.json'
+ACTIVE_FILE = 'ACTIVE'
+
+BUNDLE_FILES = {
+    'model': 'model.pkl',
+    'scaler': 'scaler.pkl',
+    'encoders': 'label_encoders.pkl',
+    'feature_columns': 'feature_columns.pkl'
+}
+
+MODEL_SNAPSHOT_DIR = os.environ.get('MODEL_SNAPSHOT_DIR', os.path.join('.cache', 'serving'))
+# Bump when the snapshot layout changes so old snapshots are ignored
+SNAPSHOT_FORMAT = 1
+
+LEGACY_FILES = {
+    'model': 'best_car_price_model.pkl',
+    'scaler': 'car_price_scaler.pkl',
+    'encoders': 'label_encoders.pkl',
+    'feature_columns': 'feature_columns.pkl'
+}
+
+# Numeric part of the row used to warm up a freshly loaded bundle
+WARMUP_CAR = {
+    'year': 2018, 'km_driven': 40000, 'mileage': 19.5, 'engine': 1197,
+    'max_power': 82.0, 'seats': 5, 'torque_value': 113.0
+}
+
+
+def build_verified_engine(model, kind):
+    """Build the requested inference engine, falling back to sklearn if it can't be trusted"""
+    try:
+        engine = build_engine(model, kind)
+        if kind == 'compiled' and not engine.matches(model):
+            logger.warning("Compiled engine disagrees with model.predict, using sklearn engine")
+            return build_engine(model, 'sklearn')
+        return engine
+    except ValueError as e:
+        logger.warning(f"Could not build '{kind}' engine ({e}), using sklearn engine")
+        return build_engine(model, 'sklearn')
+
+
+class ModelBundle:
+    """One model version with everything needed to serve predictions from it"""
+
+    def __init__(self, version, model, scaler, encoders, feature_columns, manifest=None, engine='compiled'):
+        self.version = version
+        self.feature_columns = list(feature_columns)
+        self.manifest = manifest or {'version': version}
+        self._artifacts = {'model': model, 'scaler': scaler, 'encoders': encoders}
+        self._loader = None
+        self._lock = threading.Lock()
+        self.predictor = build_verified_engine(model, engine)
+        self.encoding_tables = EncodingTables(encoders)
+        # Set by the app when the bundle is activated
+        self.generation = None
+
+    @classmethod
+    def from_snapshot(cls, version, snapshot, manifest, loader):
+        """Bundle served from a snapshot; loader(name) unpickles an artifact when first needed"""
+        bundle = cls.__new__(cls)
+        bundle.version = version
+        bundle.feature_columns = snapshot['feature_columns']
+        bundle.manifest = manifest or {'version': version}
+        bundle._artifacts = {}
+        bundle._loader = loader
+        bundle._lock = threading.Lock()
+        bundle.predictor = CompiledTreeEngine.from_arrays(snapshot['engine'], lambda: bundle.model)
+        bundle.encoding_tables = EncodingTables.from_classes(snapshot['classes'])
+        bundle.generation = None
+        return bundle
+
+    def _artifact(self, name):
+        if name not in self._artifacts:
+            with self._lock:
+                if name not in self._artifacts:
+                    self._artifacts[name] = self._loader(name)
+        return self._artifacts[name]
+
+    @property
+    def model(self):
+        return self._artifact('model')
+
+    @property
+    def scaler(self):
+        return self._artifact('scaler')
+
+    @property
+    def encoders(self):
+        return self._artifact('encoders')
+
+    def available(self, name):
+        """True when the artifact is loaded or can be loaded on demand, without loading it"""
+        return self._artifacts.get(name) is not None or (name not in self._artifacts and self._loader is not None)
+
+    def snapshot(self):
+        """Serving snapshot contents, or None when the predictor isn't the compiled engine"""
+        classes = self.encoding_tables.classes()
+        if self.predictor.name != 'compiled' or not all(
+                isinstance(label, str) for labels in classes.values() for label in labels):
+            return None
+        return {'engine': self.predictor.to_arrays(), 'classes': classes, 'feature_columns': self.feature_columns}
+
+    def warm_up(self):
+        """Push a single row and a small batch through the full prediction path"""
+        car = dict(WARMUP_CAR)
+        for col, table in self.encoding_tables.tables.items():
+            car[col] = next(iter(table))
+        for batch in ([car], [car] * 128):
+            for result, error in predict_batch(batch, self.predictor, self.encoding_tables, self.feature_columns):
+                if error:
+                    raise ValueError(f"Warm-up prediction failed for model {self.version}: {error}")
+
+
+def _unpickle(path):
+    import joblib
+    return joblib.load(path)
+
+
+def artifacts_digest(paths):
+    """SHA-256 over the artifact files' bytes, identifying their serving snapshot"""
+    digest = hashlib.sha256(f"snapshot-{SNAPSHOT_FORMAT}".encode())
+    for name in sorted(paths):
+        digest.update(name.encode())
+        with open(paths[name], 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def write_snapshot(path, snapshot):
+    """Save a snapshot as one .npz (no pickled objects) via an atomic rename"""
+    arrays = {f"engine__{name}": value for name, value in snapshot['engine'].items()}
+    arrays.update({f"classes__{col}": np.array(labels, dtype=str) for col, labels in snapshot['classes'].items()})
+    arrays['feature_columns'] = np.array(snapshot['feature_columns'], dtype=str)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, staging = tempfile.mkstemp(prefix='.snapshot-', suffix='.npz', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(staging, path)
+    except Exception:
+        if os.path.exists(staging):
+            os.unlink(staging)
+        raise
+
+
+def read_snapshot(path):
+    """Snapshot written by write_snapshot, or None if there isn't one"""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            snapshot = {'engine': {}, 'classes': {}}
+            for key in data.files:
+                group, _, name = key.partition('__')
+                if group == 'engine':
+                    snapshot['engine'][name] = data[key]
+                elif group == 'classes':
+                    snapshot['classes'][name] = data[key].tolist()
+            snapshot['feature_columns'] = data['feature_columns'].tolist()
+        return snapshot
+    except FileNotFoundError:
+        return None
+
+
+def check_version_name(version):
+    """version, or ValueError if it isn't a plain version name (it becomes a path component)"""
+    if not isinstance(version, str) or not VERSION_PATTERN.match(version) or '..' in version:
+        raise ValueError(f"Invalid model version name: {version!r}")
+    return version
+
+
+class ModelRegistry:
+    """Directory of versioned artifact bundles plus a pointer to the active one"""
+
+    def __init__(self, root=MODEL_REGISTRY_DIR, snapshot_dir=MODEL_SNAPSHOT_DIR):
+        self.root = root
+        self.snapshot_dir = snapshot_dir
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def _stored_version(self, version):
+        """Directory of a stored version; only names listed in the registry itself are accepted"""
+        check_version_name(version)
+        names = os.listdir(self.root) if os.path.isdir(self.root) else []
+        if version not in names or not os.path.isfile(self._path(version, MANIFEST_FILE)):
+            raise FileNotFoundError(f"Model version {version} not found in {self.root}")
+        return self._path(version)
+
+    def versions(self):
+        """Manifests of every stored version, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        manifests = []
+        for name in sorted(os.listdir(self.root)):
+            manifest_path = self._path(name, MANIFEST_FILE)
+            if os.path.isfile(manifest_path):
+                with open(manifest_path) as f:
+                    manifests.append(json.load(f))
+        return manifests
+
+    def active_version(self):
+        """Version named in the ACTIVE pointer, else the newest stored version, else None"""
+        try:
+            with open(self._path(ACTIVE_FILE)) as f:
+                version = f.read().strip()
+            if version:
+                return version
+        except FileNotFoundError:
+            pass
+        versions = self.versions()
+        return versions[-1]['version'] if versions else None
+
+    def active_marker(self):
+        """Changes whenever the active version may have changed (used for polling)"""
+        try:
+            return os.stat(self._path(ACTIVE_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self, version=None, engine='compiled'):
+        """Load a bundle: the given version, the active one, or the legacy root artifacts"""
+        version = version or self.active_version()
+        if version is None:
+            return self._load_files(LEGACY_MODEL_VERSION, LEGACY_FILES, '.',
+                                    {'version': LEGACY_MODEL_VERSION, 'source': 'legacy'}, engine)
+        directory = self._stored_version(version)
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        return self._load_files(version, BUNDLE_FILES, directory, manifest, engine)
+
+    def _load_files(self, version, files, directory, manifest, engine):
+        paths = {name: os.path.join(directory, filename) for name, filename in files.items()}
+        snapshot_path = None
+        if engine == 'compiled' and self.snapshot_dir:
+            snapshot_path = os.path.join(self.snapshot_dir, f"{artifacts_digest(paths)[:24]}.npz")
+            try:
+                snapshot = read_snapshot(snapshot_path)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable serving snapshot {snapshot_path}: {e}")
+                snapshot = None
+            if snapshot is not None:
+                return ModelBundle.from_snapshot(version, snapshot, manifest,
+                                                 lambda name: _unpickle(paths[name]))
+
+        artifacts = {name: _unpickle(path) for name, path in paths.items()}
+        bundle = ModelBundle(version, manifest=manifest, engine=engine, **artifacts)
+        snapshot = bundle.snapshot() if snapshot_path else None
+        if snapshot is not None:
+            try:
+                write_snapshot(snapshot_path, snapshot)
+            except OSError as e:
+                logger.warning(f"Could not write serving snapshot {snapshot_path}: {e}")
+        return bundle
+
+    def save(self, model, scaler, encoders, feature_columns, metadata=None, version=None):
+        """Write a new bundle atomically and return its version"""
+        import joblib
+        import sklearn
+
+        version = check_version_name(version or datetime.now().strftime('%Y%m%d-%H%M%S'))
+        target = self._path(version)
+        if os.path.exists(target):
+            raise FileExistsError(f"Model version {version} already exists")
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f'.{version}-', dir=self.root)
+        try:
+            artifacts = {'model': model, 'scaler': scaler, 'encoders': encoders,
+                         'feature_columns': list(feature_columns)}
+            for name, filename in BUNDLE_FILES.items():
+                joblib.dump(artifacts[name], os.path.join(staging, filename))
+            manifest = {
+                'version': version,
+                'created_at': datetime.now().isoformat(),
+                'model_type': type(model).__name__,
+                'sklearn_version': sklearn.__version__,
+                'feature_columns': list(feature_columns),
+                **(metadata or {})
+            }
+            with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            # Load and exercise the bundle before it becomes visible, so a version that can't be
+            # served never lands in the registry. This also writes the serving snapshot (keyed by
+            # artifact bytes, so it still matches after the rename) and the first load skips sklearn.
+            self._load_files(version, BUNDLE_FILES, staging, manifest, 'compiled').warm_up()
+            # mkdtemp creates the directory 0700 and the rename keeps that mode; published
+            # versions must be readable by serving workers running as other users
+            os.chmod(staging, 0o755)
+            os.rename(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
+
+    def activate(self, version):
+        """Point ACTIVE at version (atomic rename, so readers never see a partial file)"""
+        self._stored_version(version)
+        fd, staging = tempfile.mkstemp(prefix='.ACTIVE-', dir=self.root)
+        with os.fdopen(fd, 'w') as f:
+            f.write(version + '\n')
+        os.replace(staging, self._path(ACTIVE_FILE))
@@ -0,0 +1,173 @@
+import numpy as np
+
+from timing import stage
+
+# Year the training notebook used to derive car_age
+REFERENCE_YEAR = 2024
+
+CATEGORICAL_COLUMNS = ['brand', 'fuel', 'seller_type', 'transmission', 'owner']
+
+NUMERIC_COLUMNS = ['year', 'km_driven', 'mileage', 'engine', 'max_power', 'seats', 'torque_value']
+
+INPUT_FIELDS = ['brand', 'year', 'km_driven', 'fuel', 'seller_type', 'transmission', 'owner',
+                'mileage', 'engine', 'max_power', 'seats', 'torque_value']
+
+# Fields predict_car_price rejects when falsy ("Missing required fields")
+REQUIRED_FIELDS = ['brand', 'year', 'km_driven', 'fuel', 'seller_type', 'transmission', 'owner']
+
+
+def add_engineered_features(frame):
+    """Add the derived columns the model was trained on"""
+    frame['car_age'] = REFERENCE_YEAR - frame['year']
+    frame['power_to_weight'] = frame['max_power'] / frame['engine'] * 1000
+    frame['mileage_efficiency'] = frame['mileage'] / frame['engine'] * 1000
+    frame['power_to_weight'] = frame['power_to_weight'].replace([np.inf, -np.inf], 0)
+    frame['mileage_efficiency'] = frame['mileage_efficiency'].replace([np.inf, -np.inf], 0)
+    return frame
+
+
+def build_price_result(prediction):
+    """Wrap a raw model output with the +/-15% confidence band"""
+    confidence_lower = prediction * 0.85
+    confidence_upper = prediction * 1.15
+    return {
+        'price': prediction,
+        'confidence_lower': confidence_lower,
+        'confidence_upper': confidence_upper,
+        'confidence_range': f"₹{confidence_lower:,.0f} - ₹{confidence_upper:,.0f}"
+    }
+
+
+class EncodingTables:
+    """LabelEncoder classes_ precompiled into dict lookups.
+
+    Built once per loaded model so encoding a value is a single hash lookup
+    instead of sklearn's np.unique/searchsorted pass over a one-element list.
+    """
+
+    def __init__(self, encoders):
+        self.tables = {
+            col: {label: code for code, label in enumerate(encoder.classes_)}
+            for col, encoder in encoders.items()
+        }
+
+    @classmethod
+    def from_classes(cls, classes):
+        """Tables built from {column: labels in code order} instead of fitted encoders"""
+        tables = cls.__new__(cls)
+        tables.tables = {col: {label: code for code, label in enumerate(labels)} for col, labels in classes.items()}
+        return tables
+
+    def classes(self):
+        """{column: labels in code order}, the inverse of from_classes"""
+        return {col: list(table) for col, table in self.tables.items()}
+
+    def __contains__(self, col):
+        return col in self.tables
+
+    def encode(self, col, value):
+        """Code for one value; raises ValueError for labels unseen in training"""
+        try:
+            return self.tables[col][value]
+        except (KeyError, TypeError):
+            raise ValueError(f"Unknown {col} value: {value}") from None
+
+    def encode_series(self, col, values):
+        """Codes for a Series of labels, NaN where the label is unknown"""
+        return values.map(self.tables[col])
+
+
+def _flag_errors(errors, mask, message):
+    """Record message for every row in mask that has no error yet"""
+    for i in np.flatnonzero(mask):
+        if errors[i] is None:
+            errors[i] = message(i) if callable(message) else message
+
+
+def predict_batch(cars, model, tables, feature_columns):
+    """Predict prices for many cars with one feature pass and one model.predict call.
+
+    Returns a list of (result, error) tuples in input order, mirroring the
+    return value of predict_car_price for each row.
+    """
+    n_rows = len(cars)
+    if n_rows == 0:
+        return []
+    errors = [None] * n_rows
+    records = []
+    for i, car in enumerate(cars):
+        if isinstance(car, dict):
+            records.append(car)
+        else:
+            records.append({})
+            errors[i] = "Each car must be a JSON object"
+
+    with stage('validate'):
+        frame = _validate_batch(records, errors)
+
+    with stage('encode'):
+        for col in CATEGORICAL_COLUMNS:
+            if col not in tables:
+                return [(None, f"Encoder not available for {col}")] * n_rows
+            values = frame[col]
+            codes = tables.encode_series(col, values)
+            _flag_errors(errors, codes.isna().to_numpy(),
+                         lambda i, col=col, values=values: f"Unknown {col} value: {values.iloc[i]}")
+            frame[col + '_encoded'] = codes
+
+    valid = np.array([error is None for error in errors])
+    results = [(None, error) for error in errors]
+    if not valid.any():
+        return results
+
+    with stage('features'):
+        frame = add_engineered_features(frame.loc[valid].copy())
+        try:
+            X_input = frame[feature_columns]
+        except KeyError as e:
+            return [(None, f"Missing feature columns: {e}")] * n_rows
+        # Rows the model would reject (e.g. 0/0 engineered ratios) fail alone, not the whole batch
+        rows = np.flatnonzero(valid)
+        finite = np.isfinite(X_input.to_numpy(dtype=np.float64)).all(axis=1)
+        for i in rows[~finite]:
+            results[i] = (None, "Input contains NaN or infinity")
+        if not finite.any():
+            return results
+    with stage('predict'):
+        predictions = model.predict(X_input[finite] if not finite.all() else X_input)
+
+    for i, prediction in zip(rows[finite], predictions):
+        results[i] = (build_price_result(prediction), None)
+    return results
+
+
+def _validate_batch(records, errors):
+    """Frame of the input fields with numeric columns coerced, flagging bad rows in errors"""
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(records, columns=INPUT_FIELDS)
+
+    for field in INPUT_FIELDS:
+        _flag_errors(errors, frame[field].isna().to_numpy(), f"Missing required field: {field}")
+
+    # Lists/dicts can't be looked up in the encoding tables; blank them so only their row fails
+    for field in CATEGORICAL_COLUMNS:
+        raw = frame[field]
+        bad = raw.map(lambda value: not (value is None or isinstance(value, (str, int, float, np.generic))))
+        _flag_errors(errors, bad.to_numpy(dtype=bool),
+                     lambda i, field=field, raw=raw: f"Unknown {field} value: {raw.iloc[i]}")
+        if bad.any():
+            frame[field] = raw.where(~bad, None)
+
+    for field in NUMERIC_COLUMNS:
+        raw = frame[field]
+        frame[field] = pd.to_numeric(raw, errors='coerce')
+        _flag_errors(errors, ~np.isfinite(frame[field]).to_numpy(),
+                     lambda i, field=field, raw=raw: f"Invalid {field} value: {raw.iloc[i]}")
+
+    for field in REQUIRED_FIELDS:
+        column = frame[field]
+        falsy = column.isna() | column.isin([0, '', False])
+        _flag_errors(errors, falsy.to_numpy(), "Missing required fields")
+
+    return frame
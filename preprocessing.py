@@ -0,0 +1,222 @@
+"""
+Cleaning of raw listings in the Car_details.csv format into model inputs.
+
+Shared by training and serving. The vectorized parsers reproduce the data
+cleaning cells of the training notebook (Untitled1.ipynb) exactly, and the
+original row-by-row clean_* functions are kept as the reference path.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from prediction import INPUT_FIELDS
+
+UNIT_COLUMNS = ['mileage', 'engine', 'max_power', 'torque_value']
+
+# How torque_value is expressed: the first number as written, or always Nm
+TORQUE_UNITS = ('raw', 'nm')
+
+KGM_TO_NM = 9.80665
+
+
+def clean_mileage(value):
+    """Extract number from strings like "19.67 kmpl" or "18.9" """
+    if pd.isna(value) or value == '':
+        return np.nan
+    match = re.search(r'(\d+\.?\d*)', str(value))
+    return float(match.group(1)) if match else np.nan
+
+
+def clean_engine(value):
+    """Extract number from strings like "1197 CC" """
+    if pd.isna(value) or value == '':
+        return np.nan
+    match = re.search(r'(\d+)', str(value))
+    return float(match.group(1)) if match else np.nan
+
+
+def clean_max_power(value):
+    """Extract number from strings like "81.80 bhp" """
+    if pd.isna(value) or value == '':
+        return np.nan
+    match = re.search(r'(\d+\.?\d*)', str(value))
+    return float(match.group(1)) if match else np.nan
+
+
+def clean_torque(value):
+    """Extract the first number from torque strings"""
+    if pd.isna(value) or value == '':
+        return np.nan
+    match = re.search(r'(\d+\.?\d*)', str(value))
+    return float(match.group(1)) if match else np.nan
+
+
+def clean_units_apply(df):
+    """Row-by-row reference implementation: the notebook's df[col].apply(clean_*) path"""
+    return pd.DataFrame({
+        'mileage': df['mileage'].apply(clean_mileage),
+        'engine': df['engine'].apply(clean_engine),
+        'max_power': df['max_power'].apply(clean_max_power),
+        'torque_value': df['torque'].apply(clean_torque)
+    }, index=df.index)
+
+
+# Up to this many distinct strings, a compiled-regex loop over them beats the pandas str accessor,
+# whose fixed per-call cost dominates at the few hundred uniques real listings have
+REGEX_LOOP_MAX_UNIQUES = 5000
+
+_NUMBER = re.compile(r'(\d+\.?\d*)')
+_INTEGER = re.compile(r'(\d+)')
+_TORQUE_UNIT = re.compile(r'(?i)(kgm|nm)')
+_TORQUE_RPM = re.compile(r'(?i)(?:@|\bat\b|/)\s*(\d+\.?\d*)(?:\s*[-~]\s*(\d+\.?\d*))?(?:\s*\+/-\s*(\d+\.?\d*))?')
+# A handful of torque strings carry no unit ("210 / 1900", "510@ 1600-2400"); kgm figures for
+# passenger cars stay well under this, Nm figures well above it
+KGM_MAX = 50
+
+
+def _distinct_columns(series, parse_each, parse_vectorized):
+    """Parse each distinct string once and broadcast the result back to every row.
+
+    Unit columns are highly repetitive (a few hundred distinct strings across
+    thousands of listings), so factorizing first turns a per-row regex pass
+    into a hash pass plus a regex pass over the uniques. Both parsers return
+    {column: values per unique}; the result is {column: float array per row}.
+    """
+    codes, uniques = pd.factorize(series.to_numpy(), use_na_sentinel=True)
+    if len(uniques) <= REGEX_LOOP_MAX_UNIQUES:
+        columns = parse_each([str(value) for value in uniques])
+    else:
+        columns = parse_vectorized(pd.Series(uniques, dtype=object).astype(str))
+    # factorize marks missing values with -1; point them at a trailing NaN
+    codes = np.where(codes < 0, len(uniques), codes)
+    return {name: np.append(np.asarray(values, dtype=np.float64), np.nan).take(codes)
+            for name, values in columns.items()}
+
+
+def _parse_distinct(series, parse_each, parse_vectorized):
+    """_distinct_columns as a Series (single 'value' column) or DataFrame on the series' index"""
+    columns = _distinct_columns(series, parse_each, parse_vectorized)
+    if list(columns) == ['value']:
+        return pd.Series(columns['value'], index=series.index, name=series.name)
+    return pd.DataFrame(columns, index=series.index)
+
+
+def _first_number(pattern):
+    """(per-unique loop, vectorized) parsers for the first match of pattern as a float"""
+    def parse_each(values):
+        matches = [pattern.search(value) for value in values]
+        return {'value': [float(match.group(1)) if match else np.nan for match in matches]}
+
+    def parse_vectorized(values):
+        return {'value': pd.to_numeric(values.str.extract(pattern.pattern, expand=False), errors='coerce')}
+    return parse_each, parse_vectorized
+
+
+def _torque_columns(number, is_kgm, low, high, spread):
+    return {
+        'torque_value': number,
+        'torque_nm': np.where(is_kgm, number * KGM_TO_NM, number),
+        'torque_rpm_low': np.where(np.isnan(high), low - spread, low),
+        'torque_rpm_high': np.where(np.isnan(high), low + spread, high)
+    }
+
+
+def _parse_torque_each(values):
+    nan = np.nan
+    number, is_kgm, low, high, spread = [], [], [], [], []
+    for value in values:
+        normalized = value.replace(',', '')
+        match = _NUMBER.search(normalized)
+        first = float(match.group(1)) if match else nan
+        number.append(first)
+        unit = _TORQUE_UNIT.search(normalized)
+        is_kgm.append(unit.group(1).lower() == 'kgm' if unit else first < KGM_MAX)
+        match = _TORQUE_RPM.search(normalized)
+        if match:
+            rpm_low, rpm_high, rpm_spread = match.groups()
+            low.append(float(rpm_low))
+            high.append(float(rpm_high) if rpm_high else nan)
+            spread.append(float(rpm_spread) if rpm_spread else 0.0)
+        else:
+            low.append(nan)
+            high.append(nan)
+            spread.append(0.0)
+    return _torque_columns(np.array(number), np.array(is_kgm, dtype=bool),
+                           np.array(low), np.array(high), np.array(spread))
+
+
+def _parse_torque_vectorized(values):
+    normalized = values.str.replace(',', '', regex=False)
+    number = pd.to_numeric(normalized.str.extract(_NUMBER.pattern, expand=False), errors='coerce').to_numpy()
+    unit = normalized.str.extract(_TORQUE_UNIT.pattern, expand=False).str.lower()
+    is_kgm = np.where(unit.notna(), unit == 'kgm', number < KGM_MAX)
+    rpm = normalized.str.extract(_TORQUE_RPM.pattern).apply(pd.to_numeric, errors='coerce')
+    return _torque_columns(number, is_kgm, rpm[0].to_numpy(dtype=np.float64), rpm[1].to_numpy(dtype=np.float64),
+                           rpm[2].fillna(0).to_numpy(dtype=np.float64))
+
+
+def parse_mileage(series):
+    """Mileage number from "21.14 kmpl" / "26.6 km/kg" strings"""
+    return _parse_distinct(series, *_first_number(_NUMBER))
+
+
+def parse_engine(series):
+    """Displacement in CC from "1498 CC" strings"""
+    return _parse_distinct(series, *_first_number(_INTEGER))
+
+
+def parse_max_power(series):
+    """Power in bhp from "103.52 bhp" strings"""
+    return _parse_distinct(series, *_first_number(_NUMBER))
+
+
+def parse_torque(series):
+    """Torque columns from the free-form torque strings.
+
+    torque_value is the first number as written (what the notebook trained
+    on), torque_nm converts kgm figures to Nm, and torque_rpm_low/high hold
+    the rpm band ("1500-2500rpm", "3,000+/-500") or the same value twice for
+    a single rpm.
+    """
+    return _parse_distinct(series, _parse_torque_each, _parse_torque_vectorized)
+
+
+def clean_units(df, torque_units='raw'):
+    """Numeric mileage/engine/max_power/torque_value columns parsed from the unit strings.
+
+    torque_units='raw' keeps the first torque number whatever its unit, as the
+    notebook did; 'nm' converts kgm figures so torque_value is always in Nm.
+    """
+    if torque_units not in TORQUE_UNITS:
+        raise ValueError(f"torque_units must be one of {TORQUE_UNITS}")
+    # Raw arrays straight into one frame: at a few thousand rows the per-column Series/DataFrame
+    # construction in parse_* costs as much as the parsing itself
+    torque = _distinct_columns(df['torque'], _parse_torque_each, _parse_torque_vectorized)
+    return pd.DataFrame({
+        'mileage': _distinct_columns(df['mileage'], *_first_number(_NUMBER))['value'],
+        'engine': _distinct_columns(df['engine'], *_first_number(_INTEGER))['value'],
+        'max_power': _distinct_columns(df['max_power'], *_first_number(_NUMBER))['value'],
+        'torque_value': torque['torque_nm'] if torque_units == 'nm' else torque['torque_value']
+    }, index=df.index)
+
+
+def training_fill_values(df, torque_units='raw'):
+    """Medians (and the seats mode) the notebook used to fill missing values"""
+    cleaned = clean_units(df, torque_units)
+    fill_values = {col: float(cleaned[col].median()) for col in UNIT_COLUMNS}
+    fill_values['seats'] = float(pd.to_numeric(df['seats'], errors='coerce').mode()[0])
+    return fill_values
+
+
+def prepare_cars(df, fill_values, torque_units='raw'):
+    """Model input frame (INPUT_FIELDS columns) for raw rows in the Car_details.csv format"""
+    cars = clean_units(df, torque_units)
+    for col in UNIT_COLUMNS:
+        cars[col] = cars[col].fillna(fill_values[col])
+    cars['seats'] = pd.to_numeric(df['seats'], errors='coerce').fillna(fill_values['seats'])
+    cars['brand'] = df['name'].astype(str).str.split().str[0]
+    for col in ['year', 'km_driven', 'fuel', 'seller_type', 'transmission', 'owner']:
+        cars[col] = df[col]
+    return cars[INPUT_FIELDS]
@@ -0,0 +1,104 @@
+"""
+In-process inverted index for ranked car search.
+
+Database.page_cars answers free-text searches with the MongoDB text index.
+When the server can't (no text index support, as in some embedded or mock
+servers, or the index is still building), it falls back to this index: the
+searchable fields of every car are tokenized into term -> posting lists,
+and a query only touches the postings of its own terms, so latency tracks
+the number of matches rather than the catalog size.
+
+The index is rebuilt from the collection when it is older than its TTL or
+after a write through this process's Database.
+"""
+
+import heapq
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+
+# Field weights, shared with the MongoDB text index so both rank alike
+TEXT_WEIGHTS = {
+    'brand': 10,
+    'model': 10,
+    'car_details.variant': 6,
+    'fuel': 4,
+    'location': 4,
+    'features': 2,
+    'description': 1
+}
+# Results ranked per query; deeper pages aren't served
+MAX_TEXT_RESULTS = 1000
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+# BM25-style saturation: repeating a term helps less each time
+_SATURATION = 1.2
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text).lower())
+
+
+def field_values(document, field):
+    """Strings stored under a dotted field, flattening lists (features)"""
+    value = document
+    for part in field.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    if value is None:
+        return []
+    return [str(item) for item in value] if isinstance(value, list) else [str(value)]
+
+
+class SearchIndex:
+    """Weighted term -> {car _id: weight} postings, rebuilt lazily from load_documents()"""
+
+    def __init__(self, load_documents, ttl=300):
+        self.load_documents = load_documents
+        self.ttl = ttl
+        self._postings = {}
+        self._size = 0
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._built_at = None
+
+    def _build(self):
+        postings = defaultdict(lambda: defaultdict(float))
+        size = 0
+        for document in self.load_documents():
+            size += 1
+            for field, weight in TEXT_WEIGHTS.items():
+                for value in field_values(document, field):
+                    for term in tokenize(value):
+                        postings[term][document['_id']] += weight
+        self._postings = {term: dict(docs) for term, docs in postings.items()}
+        self._size = size
+        self._built_at = time.monotonic()
+
+    def _fresh(self):
+        if self._built_at is None or time.monotonic() - self._built_at > self.ttl:
+            with self._lock:
+                if self._built_at is None or time.monotonic() - self._built_at > self.ttl:
+                    self._build()
+        return self._postings, self._size
+
+    def search(self, text, limit=MAX_TEXT_RESULTS):
+        """(_id, score) pairs, best first; any query term may match, rarer terms count more"""
+        postings, size = self._fresh()
+        scores = defaultdict(float)
+        for term in set(tokenize(text)):
+            docs = postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + size / len(docs))
+            for doc_id, weight in docs.items():
+                scores[doc_id] += idf * weight * (_SATURATION + 1) / (weight + _SATURATION)
+        # Ties broken by _id so pages are stable
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], str(item[0])))
+
+    def stats(self):
+        return {'terms': len(self._postings), 'documents': self._size,
+                'age_seconds': None if self._built_at is None else round(time.monotonic() - self._built_at, 1)}
@@ -0,0 +1,35 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# {stage name: milliseconds} for the request being handled, None outside a request
+_timings = ContextVar('stage_timings', default=None)
+
+
+def start_request():
+    """Begin collecting stage timings for the current request"""
+    _timings.set({})
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block and add it to the current request's timings"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def finish_request():
+    """Stop collecting and return the recorded {stage: milliseconds}"""
+    timings = _timings.get() or {}
+    _timings.set(None)
+    return timings
+
+
+def server_timing_header(timings):
+    """Format timings as a Server-Timing header value"""
+    return ', '.join(f"{name};dur={ms:.3f}" for name, ms in timings.items())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Training Pipeline
+Scripted version of the training notebook: builds features from
+Car_details.csv (through the dataset cache), trains the candidate models in
+parallel, and writes the best one to the model registry as a complete bundle
+the app can load.
+
+Usage:
+  python train.py                          # train, save a new version
+  python train.py --activate --n-jobs 4    # ...and make it the served version
+  python train.py --candidates gradient_boosting random_forest
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.svm import SVR
+
+from dataset import TARGET_COLUMN, load_dataset
+from model_registry import MODEL_REGISTRY_DIR, ModelRegistry
+from prediction import CATEGORICAL_COLUMNS
+from preprocessing import TORQUE_UNITS
+
+try:
+    from xgboost import XGBRegressor
+except ImportError:
+    XGBRegressor = None
+
+FEATURE_COLUMNS = [
+    'brand_encoded', 'car_age', 'km_driven', 'fuel_encoded', 'seller_type_encoded',
+    'transmission_encoded', 'owner_encoded', 'mileage', 'engine',
+    'max_power', 'seats', 'torque_value', 'power_to_weight', 'mileage_efficiency'
+]
+
+RANDOM_STATE = 42
+
+
+def candidate_models():
+    """The notebook's candidates; scale-sensitive ones are wrapped with a StandardScaler.
+
+    Wrapping keeps scaling inside the saved estimator, so the app can call
+    predict on raw features whichever candidate wins.
+    """
+    candidates = {
+        'random_forest': RandomForestRegressor(
+            n_estimators=200, max_depth=15, min_samples_split=5,
+            min_samples_leaf=2, random_state=RANDOM_STATE
+        ),
+        'gradient_boosting': GradientBoostingRegressor(
+            n_estimators=150, max_depth=6, learning_rate=0.1,
+            subsample=0.8, random_state=RANDOM_STATE
+        ),
+        'linear_regression': make_pipeline(StandardScaler(), LinearRegression()),
+        'svr': make_pipeline(StandardScaler(), SVR(kernel='rbf', C=100, gamma=0.1))
+    }
+    if XGBRegressor is not None:
+        candidates['xgboost'] = XGBRegressor(
+            n_estimators=200, max_depth=6, learning_rate=0.1, subsample=0.8,
+            colsample_bytree=0.8, random_state=RANDOM_STATE, n_jobs=1
+        )
+    return candidates
+
+
+def encode_features(frame):
+    """Fit one LabelEncoder per categorical column and add the *_encoded columns"""
+    frame = frame.copy()
+    encoders = {}
+    for col in CATEGORICAL_COLUMNS:
+        encoder = LabelEncoder()
+        frame[col + '_encoded'] = encoder.fit_transform(frame[col].astype(str))
+        encoders[col] = encoder
+    return frame, encoders
+
+
+def split(X, y, test_size=0.2):
+    """The notebook's split: 80/20, stratified on five price bins"""
+    return train_test_split(X, y, test_size=test_size, random_state=RANDOM_STATE,
+                            stratify=pd.cut(y, bins=5))
+
+
+def evaluate(y_true, y_pred):
+    return {
+        'r2': float(r2_score(y_true, y_pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        'mae': float(mean_absolute_error(y_true, y_pred))
+    }
+
+
+def fit_candidate(name, model, X_train, y_train, X_test, y_test):
+    """Fit one candidate and return (name, fitted model, metrics, train seconds)"""
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - started
+    return name, model, evaluate(y_test, model.predict(X_test)), train_seconds
+
+
+def train(csv_path='Car_details.csv', candidates=None, n_jobs=-1, torque_units='raw'):
+    """Train the candidates in parallel; returns (results by name, best name, artifacts)"""
+    dataset = load_dataset(csv_path, torque_units)
+    frame, encoders = encode_features(dataset.frame)
+    X = frame[FEATURE_COLUMNS]
+    y = frame[TARGET_COLUMN]
+    X_train, X_test, y_train, y_test = split(X, y)
+
+    models = candidate_models()
+    if candidates:
+        unknown = set(candidates) - set(models)
+        if unknown:
+            raise ValueError(f"Unknown candidates {sorted(unknown)}, expected some of {sorted(models)}")
+        models = {name: models[name] for name in candidates}
+
+    print(f"Training {len(models)} candidates on {len(X_train):,} rows (n_jobs={n_jobs})...")
+    started = time.perf_counter()
+    fitted = Parallel(n_jobs=n_jobs)(
+        delayed(fit_candidate)(name, model, X_train, y_train, X_test, y_test)
+        for name, model in models.items()
+    )
+    wall_seconds = time.perf_counter() - started
+
+    results = {}
+    for name, model, metrics, train_seconds in fitted:
+        results[name] = {'model': model, 'metrics': metrics, 'train_seconds': round(train_seconds, 3)}
+        print(f"  ➤ {name:<18} R2 {metrics['r2']:.4f}  MAE ₹{metrics['mae']:,.0f}  ({train_seconds:.2f}s)")
+    print(f"Trained in {wall_seconds:.2f}s wall clock")
+
+    best = max(results, key=lambda name: results[name]['metrics']['r2'])
+    # Kept in the bundle for clients that scale inputs themselves, as with the notebook artifacts
+    scaler = StandardScaler().fit(X_train)
+    artifacts = {
+        'model': results[best]['model'],
+        'scaler': scaler,
+        'encoders': encoders,
+        'feature_columns': FEATURE_COLUMNS,
+        'dataset': dataset,
+        'wall_seconds': wall_seconds,
+        'train_rows': len(X_train),
+        'test_rows': len(X_test)
+    }
+    return results, best, artifacts
+
+
+def save_bundle(results, best, artifacts, registry_dir=MODEL_REGISTRY_DIR, version=None):
+    """Write the winning model and its preprocessing to the registry"""
+    dataset = artifacts['dataset']
+    metadata = {
+        'candidate': best,
+        'metrics': results[best]['metrics'],
+        'candidates': {name: {'metrics': result['metrics'], 'train_seconds': result['train_seconds']}
+                       for name, result in results.items()},
+        'training_wall_seconds': round(artifacts['wall_seconds'], 3),
+        'train_rows': artifacts['train_rows'],
+        'test_rows': artifacts['test_rows'],
+        'dataset_sha256': dataset.csv_sha256,
+        'fill_values': dataset.fill_values,
+        'torque_units': dataset.schema['torque_units']
+    }
+    return ModelRegistry(registry_dir).save(
+        artifacts['model'], artifacts['scaler'], artifacts['encoders'],
+        artifacts['feature_columns'], metadata=metadata, version=version
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train car price models and save the best to the registry")
+    parser.add_argument('--csv', default='Car_details.csv')
+    parser.add_argument('--candidates', nargs='+', default=None,
+                        help=f"Subset of candidates to train (default: all of {sorted(candidate_models())})")
+    parser.add_argument('--n-jobs', type=int, default=int(os.environ.get('TRAIN_N_JOBS', -1)),
+                        help="Candidates trained in parallel (-1: all cores)")
+    parser.add_argument('--torque-units', choices=TORQUE_UNITS, default='raw')
+    parser.add_argument('--registry', default=MODEL_REGISTRY_DIR, help="Model registry directory")
+    parser.add_argument('--version', default=None, help="Version name (default: timestamp)")
+    parser.add_argument('--activate', action='store_true', help="Make the new version the active one")
+    args = parser.parse_args()
+
+    results, best, artifacts = train(args.csv, args.candidates, args.n_jobs, args.torque_units)
+    version = save_bundle(results, best, artifacts, args.registry, args.version)
+    print(f"✅ Saved {best} as model version {version} in {args.registry}")
+    if args.activate:
+        ModelRegistry(args.registry).activate(version)
+        print(f"✅ Activated model version {version}")
+
+
+if __name__ == "__main__":
+    main()
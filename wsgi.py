@@ -0,0 +1,49 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app enabled the gunicorn master imports this module once, so the
+model artifacts are unpickled a single time before workers are forked and the
+workers share those pages copy-on-write instead of each loading their own.
+"""
+
+import logging
+import os
+import resource
+
+from app import app as flask_app, load_models
+
+logger = logging.getLogger(__name__)
+
+
+def process_memory():
+    """Resident memory of this process in MB, split into shared and private pages"""
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                field, _, value = line.partition(':')
+                if field in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty'):
+                    usage[field] = int(value.split()[0]) / 1024
+    except OSError:
+        # No smaps on this platform; peak RSS is the best available figure (KB on Linux)
+        return {'rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+    return {
+        'rss_mb': round(usage.get('Rss', 0), 1),
+        'pss_mb': round(usage.get('Pss', 0), 1),
+        'shared_mb': round(usage.get('Shared_Clean', 0) + usage.get('Shared_Dirty', 0), 1),
+        'private_mb': round(usage.get('Private_Clean', 0) + usage.get('Private_Dirty', 0), 1)
+    }
+
+
+def create_app():
+    """Load the model artifacts and return the Flask app ready to serve"""
+    if not load_models():
+        raise RuntimeError("Failed to load models. Please ensure model files exist.")
+    import app as app_module
+    logger.info(f"Models loaded in {app_module.model_load_seconds:.2f}s by pid {os.getpid()}")
+    return flask_app
+
+
+app = create_app()